@@ -15,9 +15,12 @@
 from __future__ import annotations
 
 import ast
+import logging
+import operator
 import sys
-from collections import defaultdict, deque, namedtuple
-from typing import Dict, Tuple, Deque, List
+from collections import OrderedDict, defaultdict, namedtuple
+from copy import deepcopy
+from typing import Dict, FrozenSet, Tuple, List, Set
 
 import astor
 
@@ -36,16 +39,27 @@ from dmf.analysis.analysis_types import (
     Constructor,
     ArtificialClass,
 )
-from dmf.analysis.analysisbase import AnalysisBase, ProgramPoint
+from dmf.analysis.analysisbase import AnalysisBase, InterFlow, ProgramPoint
 from dmf.analysis.artificial_basic_types import ArtificialMethod
 from dmf.analysis.builtin_functions import import_a_module
-from dmf.analysis.context_sensitivity import merge, record
-from dmf.analysis.exceptions import ParsingDefaultsError, ParsingKwDefaultsError
+from dmf.analysis.context_sensitivity import (
+    EMPTY_CONTEXT,
+    ContextPolicy,
+    make_context_policy,
+)
+from dmf.analysis.def_use import temp_def_use
+from dmf.analysis.effect_list import EffectList
+from dmf.analysis.exceptions import (
+    ParsingDefaultsError,
+    ParsingKwDefaultsError,
+    SharedNamespaceWriteError,
+)
 from dmf.analysis.gets_sets import (
     getattrs,
     analysis_getattr,
     setattrs,
     analysis_setattr,
+    mro_lookup_cache,
 )
 from dmf.analysis.heap import Heap
 from dmf.analysis.implicit_names import (
@@ -56,19 +70,26 @@ from dmf.analysis.implicit_names import (
     MODULE_NAME_FLAG,
     GENERATOR,
     GENERATOR_ADDRESS,
+    ENTRY_POINT,
     numeric_methods,
     reversed_numeric_methods,
     augmented_numeric_methods,
     unary_methods,
 )
 from dmf.analysis.name_extractor import NameExtractor
+from dmf.analysis.namespace import Namespace
+from dmf.analysis.shared_version import SharedVersion
 from dmf.analysis.special_types import Any
+from dmf.analysis.stack import Frame
 from dmf.analysis.state import (
     State,
     BOTTOM,
     compare_states,
+    filled_names,
+    namespace_sizes,
+    state_delta,
     is_bot_state,
-    deepcopy_state,
+    copy_state,
     Stack,
     merge_states,
 )
@@ -78,12 +99,29 @@ from dmf.analysis.typeshed_types import (
 )
 from dmf.analysis.union_namespace import UnionNamespace
 from dmf.analysis.value import Value, type_2_value
+from dmf.analysis.worklist import Flow, WorkList, make_work_list
 from dmf.log.logger import logger
 
 Namespace_Local = "local"
 Namespace_Nonlocal = "nonlocal"
 Namespace_Global = "global"
 
+# with sys.join_states, number of replayed states kept around
+REPLAY_CACHE_SIZE = 1024
+# with sys.inline_caches, number of attribute reads remembered per label
+INLINE_CACHE_SIZE = 4
+
+# the result of reading name from the receivers, and the shared namespaces
+# read along with their versions then
+InlineCacheEntry = namedtuple(
+    "InlineCacheEntry", ["name", "receivers", "reads", "result"]
+)
+
+
+def is_current(reads) -> bool:
+    return all(namespace.version == version for namespace, version in reads)
+
+
 AdditionalEntryInfo = namedtuple(
     "AdditionalEntryInfo",
     [
@@ -108,28 +146,268 @@ class Analysis(AnalysisBase):
         sys.analysis_modules["__main__"] = type_2_value(main_module)
         main_module_dict = main_module.tp_dict
 
-        self.extremal_point: ProgramPoint = (entry_label, ())
+        self.extremal_point: ProgramPoint = (entry_label, EMPTY_CONTEXT)
         self.module_entry_info[self.extremal_point] = main_module_dict
 
     def __init__(self, main_abs_file_path: str):
         super().__init__()
         self.module_entry_info: Dict[ProgramPoint, UnionNamespace] = {}
         # work list
-        self.work_list: Deque[Tuple[ProgramPoint, ProgramPoint]] = deque()
+        self.work_list: WorkList = make_work_list(sys.worklist_strategy)
+        self.context_policy: ContextPolicy = make_context_policy(
+            sys.context_sensitivity, sys.depth, sys.context_limit
+        )
         # extremal value
         self.extremal_value: State = State(Stack())
         self.heap = Heap()
+        # classes of a previous analysis are gone
+        mro_lookup_cache.clear()
         # start point
         self.entry_program_point_info: Dict[ProgramPoint, AdditionalEntryInfo] = {}
         # record module name so that the analysis can execute exec
         self.analysis_list: defaultdict[ProgramPoint, State | BOTTOM] = defaultdict(
             lambda: BOTTOM
         )
-        self.analysis_effect_list: Dict[ProgramPoint, State] = {}
+        self.analysis_effect_list: EffectList = EffectList(self)
+        # with sys.record_effects, program point -> state after its last
+        # transfer, as long as its state hasn't changed since
+        self.recorded_effects: Dict[ProgramPoint, State | BOTTOM] = {}
+        # program point -> versions of states known to be included in its state
+        self.included_versions: defaultdict[ProgramPoint, Set[int]] = defaultdict(set)
+        # with sys.delta_propagation, program point -> for each change of its
+        # state, the names of the top frame that changed, None if others did
+        self.deltas: defaultdict[ProgramPoint, List[Set[str] | None]] = defaultdict(
+            list
+        )
+        # flow -> number of changes of its source seen when last transferred
+        self.seen_deltas: Dict[Flow, int] = {}
+        # with sys.sparse_propagation, temporaries are kept out of states.
+        # label -> temporaries defined at it
+        self.temp_defs: Dict[int, FrozenSet[str]] = {}
+        # label -> temporary -> labels of definitions reaching its use there
+        self.temp_reaching: Dict[int, Dict[str, FrozenSet[int]]] = {}
+        # label -> labels using temporaries defined at it
+        self.temp_users: defaultdict[int, Set[int]] = defaultdict(set)
+        # (definition point, temporary) -> value
+        self.temp_values: Dict[Tuple[ProgramPoint, str], Value] = {}
+        # with sys.join_states, states are only stored at join points and
+        # labels the interprocedural flows start or end at. label -> the label
+        # preceding it, for the other labels
+        self.transient_labels: Dict[int, int] = {}
+        # transient program points reached so far
+        self.transient_points: Set[ProgramPoint] = set()
+        # transient program point -> state, least recently used first
+        self.replayed_states: OrderedDict[ProgramPoint, State] = OrderedDict()
+        # entry labels of cfgs merged so far
+        self.merged_cfgs: Set[int] = set()
+        # with sys.function_summaries, entry point -> SharedVersion.version
+        # when its state last changed
+        self.summary_versions: Dict[ProgramPoint, int] = {}
+        # entry points of functions which read frames of their callers
+        self.caller_readers: Set[ProgramPoint] = set()
+        # number of calls answered by summaries
+        self.summary_hits: int = 0
+        # with sys.inline_caches, label -> attribute reads at the label, most
+        # recent last
+        self.inline_caches: Dict[int, List[InlineCacheEntry]] = defaultdict(list)
+        self.inline_cache_hits: int = 0
+        self.inline_cache_misses: int = 0
 
         self._setup_main(main_abs_file_path)
         self.analysis_list[self.extremal_point] = self.extremal_value
 
+    def merge_cfg_info(self, cfg):
+        self.work_list.add_cfg(cfg)
+        entry_label = cfg.start_block.bid
+        if entry_label not in self.merged_cfgs:
+            self.merged_cfgs.add(entry_label)
+            if sys.sparse_propagation:
+                self._add_temp_def_use(cfg)
+            if sys.join_states:
+                self._add_transient_labels(cfg)
+        return super().merge_cfg_info(cfg)
+
+    def _add_temp_def_use(self, cfg):
+        def_use = temp_def_use(cfg)
+        self.temp_defs.update(def_use.defs)
+        for label, reaching in def_use.reaching.items():
+            self.temp_reaching[label] = reaching
+            for def_labels in reaching.values():
+                for def_label in def_labels:
+                    self.temp_users[def_label].add(label)
+
+    # Labels with a single predecessor within cfg, which are none of the labels
+    # states get written to directly or interprocedural flows go through.
+    # Loops always go through a label with more predecessors.
+    def _add_transient_labels(self, cfg):
+        predecessors: Dict[int, Set[int]] = defaultdict(set)
+        for flow in cfg.edges:
+            if flow in cfg.flows:
+                fst_lab, snd_lab = flow
+                predecessors[snd_lab].add(fst_lab)
+
+        for label, labels in predecessors.items():
+            if (
+                len(labels) != 1
+                or label == cfg.start_block.bid
+                or label == cfg.final_block.bid
+                or label in cfg.call_labels
+                or label in cfg.return_labels
+                or label in cfg.dummy_labels
+                or label in cfg.module_entry_labels
+                or label in cfg.module_exit_labels
+            ):
+                continue
+            (self.transient_labels[label],) = labels
+
+    # The state at program_point. States at transient program points are
+    # replayed from the state preceding them if they are not cached.
+    def state_at(self, program_point: ProgramPoint) -> State | BOTTOM:
+        label, context = program_point
+        if label not in self.transient_labels:
+            return self.analysis_list[program_point]
+        if program_point not in self.transient_points:
+            return BOTTOM
+
+        state = self.replayed_states.get(program_point)
+        if state is not None:
+            self.replayed_states.move_to_end(program_point)
+            return state
+        prev_program_point = (self.transient_labels[label], context)
+        state = self.transfer(prev_program_point)
+        if sys.sparse_propagation:
+            self._define_temps(state, prev_program_point)
+        if not is_bot_state(state):
+            self._cache_state(program_point, state)
+        return state
+
+    def _cache_state(self, program_point: ProgramPoint, state: State):
+        self.replayed_states[program_point] = state
+        self.replayed_states.move_to_end(program_point)
+        if len(self.replayed_states) > REPLAY_CACHE_SIZE:
+            self.replayed_states.popitem(last=False)
+
+    # program points with states, including BOTTOM ones
+    def program_points(self) -> List[ProgramPoint]:
+        return list(self.analysis_list) + list(self.transient_points)
+
+    def is_program_point(self, program_point: ProgramPoint) -> bool:
+        return (
+            program_point in self.analysis_list
+            or program_point in self.transient_points
+        )
+
+    def is_reached(self, program_point: ProgramPoint) -> bool:
+        if program_point in self.transient_points:
+            return True
+        return not is_bot_state(self.analysis_list.get(program_point, BOTTOM))
+
+    # Move the temporaries defined at program_point out of state. Uses of them
+    # are transferred again if that changes their values.
+    def _define_temps(self, state: State | BOTTOM, program_point: ProgramPoint):
+        label, context = program_point
+        names = self.temp_defs.get(label)
+        if names is None or is_bot_state(state) or not state._stack.frames:
+            return
+
+        for name in names:
+            if not state._stack.top_frame().f_locals.contains(name):
+                continue
+            f_locals = state.stack.top_frame().f_locals
+            value: Value = f_locals.read_value(name)
+            f_locals.del_local_var(name)
+
+            old: Value | None = self.temp_values.get((program_point, name))
+            if old is not None and value <= old:
+                continue
+            # values may be interned, so build a new one
+            new = Value()
+            if old is not None:
+                new.inject(old)
+            new.inject(value)
+            self.temp_values[program_point, name] = new
+
+            for use_label in list(self.temp_users.get(label, ())):
+                use_point = (use_label, context)
+                if not self.is_reached(use_point):
+                    continue
+                if sys.delta_propagation:
+                    self.deltas[use_point].append(None)
+                if self.is_call_point(use_point):
+                    self.detect_flow(use_point)
+                self.work_list.push(self.generate_flow(use_point))
+
+    # the value of a temporary at program_point, None if it's not known to
+    # the def-use chains
+    def read_temp(self, name: str, program_point: ProgramPoint) -> Value | None:
+        label, context = program_point
+        def_labels = self.temp_reaching.get(label, {}).get(name)
+        if def_labels is None:
+            return None
+        value = Value()
+        for def_label in def_labels:
+            def_value = self.temp_values.get(((def_label, context), name))
+            if def_value is not None:
+                value.inject(def_value)
+        return value
+
+    # getattrs through the inline cache of the label. An entry holds as long
+    # as the receivers are the same objects and none of the class, module,
+    # function and instance dicts read to compute it changed.
+    def cached_getattrs(
+        self, program_point: ProgramPoint, receiver_value: Value, name: str
+    ) -> Value:
+        if not sys.inline_caches or receiver_value.is_any():
+            return getattrs(receiver_value, name)
+
+        label, _ = program_point
+        receivers = tuple(receiver_value)
+        entries = self.inline_caches[label]
+        for entry in entries:
+            if (
+                entry.name == name
+                and len(entry.receivers) == len(receivers)
+                and all(map(operator.is_, entry.receivers, receivers))
+                and is_current(entry.reads)
+            ):
+                self.inline_cache_hits += 1
+                # callers may write the result into states
+                result = Value()
+                result.inject_value(entry.result)
+                return result
+
+        self.inline_cache_misses += 1
+        # module and function dicts are read through the receivers, heap
+        # objects and class dicts record themselves
+        reads = [
+            (receiver.tp_dict, receiver.tp_dict.version)
+            for receiver in receivers
+            if isinstance(receiver, (AnalysisModule, AnalysisFunction))
+        ]
+        outer_reads, SharedVersion.reads = SharedVersion.reads, reads
+        try:
+            result = getattrs(receiver_value, name)
+        finally:
+            SharedVersion.reads = outer_reads
+        if outer_reads is not None:
+            outer_reads.extend(reads)
+        # descriptors carry values which are written into frames later on
+        if not is_current(reads) or (
+            not result.is_any()
+            and any(isinstance(type, AnalysisDescriptor) for type in result)
+        ):
+            return result
+
+        # entries read from dicts changed since can't be hit anymore
+        entries[:] = [entry for entry in entries if is_current(entry.reads)]
+        if len(entries) == INLINE_CACHE_SIZE:
+            del entries[0]
+        entries.append(InlineCacheEntry(name, receivers, tuple(reads), result))
+        cached_result = result
+        result = Value()
+        result.inject_value(cached_result)
+        return result
+
     def compute_fixed_point(self):
         self.initialize()
         self.iterate()
@@ -139,67 +417,255 @@ class Analysis(AnalysisBase):
         return self.analysis_effect_list
 
     def initialize(self):
-        self.work_list.extendleft(self.generate_flow(self.extremal_point))
-        self.extremal_value = deepcopy_state(self.extremal_value, self.extremal_point)
+        self.work_list.push(self.generate_flow(self.extremal_point))
+        self.extremal_value = copy_state(self.extremal_value, self.extremal_point)
 
         sys.heap = self.heap
         sys.analysis = self
 
-    def _push_state_to(self, state: State, program_point: ProgramPoint):
-        old: State | BOTTOM = self.analysis_list[program_point]
-        if not compare_states(state, old):
-            state = merge_states(state, old)
-            self.analysis_list[program_point]: State = state
-            self.detect_flow(program_point)
-            added_program_points = self.generate_flow(program_point)
-            self.work_list.extendleft(added_program_points)
+    # names, if given, are the only names of the top frame in which state may
+    # differ from the states that were pushed along the same flow before
+    def _push_state_to(
+        self, state: State, program_point: ProgramPoint, names: Set[str] | None = None
+    ):
+        # values of calls written by detect_flow
+        if sys.sparse_propagation and self.is_dummy_point(program_point):
+            self._define_temps(state, program_point)
+
+        label, _ = program_point
+        if label in self.transient_labels:
+            self._push_state_to_transient(state, program_point)
+        else:
+            self._push_state_to_stored(state, program_point, names)
 
         # additional flows?
-        self.work_list.extendleft(reversed(sys.prepend_flows))
+        self.work_list.push_first(sys.prepend_flows)
         sys.prepend_flows.clear()
 
+    def _push_state_to_stored(
+        self, state: State, program_point: ProgramPoint, names: Set[str] | None
+    ):
+        versions = self.included_versions[program_point]
+        # a version already included at this program point is still included,
+        # since states only grow
+        if state is BOTTOM or state.version not in versions:
+            old: State | BOTTOM = self.analysis_list[program_point]
+            sizes = None
+            if sys.record_effects and not is_bot_state(old):
+                sizes = namespace_sizes(old)
+            if sys.delta_propagation:
+                included = self._compare_states_delta(state, old, program_point, names)
+            else:
+                included = compare_states(state, old)
+            # names filled in old change its effect as well
+            if not included or (sizes is not None and filled_names(old, sizes)):
+                self.recorded_effects.pop(program_point, None)
+            if not included:
+                state = merge_states(state, old)
+                self.analysis_list[program_point]: State = state
+                if sys.function_summaries and self.is_entry_point(program_point):
+                    self.summary_versions[program_point] = SharedVersion.version
+                self.detect_flow(program_point)
+                added_program_points = self.generate_flow(program_point)
+                self.work_list.push(added_program_points)
+            if state is not BOTTOM and state.version is not None:
+                versions.add(state.version)
+
+    # Transient program points only have one flow reaching them, so state
+    # replaces the one there instead of being merged into it.
+    def _push_state_to_transient(self, state: State, program_point: ProgramPoint):
+        if is_bot_state(state):
+            return
+        cached: State | None = self.replayed_states.get(program_point)
+        if cached is not None and compare_states(state, cached):
+            return
+        self.transient_points.add(program_point)
+        self._cache_state(program_point, state)
+        self.recorded_effects.pop(program_point, None)
+        if sys.delta_propagation:
+            self.deltas[program_point].append(None)
+        self.work_list.push(self.generate_flow(program_point))
+
+    # Like compare_states, besides it records the names the merge that follows
+    # is going to change, as well as the names filled in old by the comparison.
+    def _compare_states_delta(
+        self,
+        state: State | BOTTOM,
+        old: State,
+        program_point: ProgramPoint,
+        names: Set[str] | None,
+    ) -> bool:
+        if is_bot_state(state):
+            return True
+        if is_bot_state(old):
+            self.deltas[program_point].append(None)
+            return False
+
+        sizes = namespace_sizes(old)
+        included = compare_states(state, old, names)
+        delta = filled_names(old, sizes)
+        if not included and delta is not None:
+            changed = state_delta(state, old, names)
+            delta = None if changed is None else delta | changed
+        if not included or delta:
+            self.deltas[program_point].append(delta)
+        return included
+
+    # names of the top frame changed at the source of flow since it was last
+    # transferred along flow, None if it's the first time or other frames
+    # changed too
+    def _flow_delta(self, flow: Flow) -> Set[str] | None:
+        program_point1, _ = flow
+        deltas = self.deltas[program_point1]
+        seen = self.seen_deltas.get(flow)
+        self.seen_deltas[flow] = len(deltas)
+        if seen is None:
+            return None
+        names = set()
+        for delta in deltas[seen:]:
+            if delta is None:
+                return None
+            names |= delta
+        return names
+
     def iterate(self):
         # as long as there are flows in work_list
         while self.work_list:
-            logger.warning(
-                f"worklist: {len(self.work_list)}, analysis list {len(self.analysis_list)}"
-            )
-            # get the leftmost one
-            program_point1, program_point2 = self.work_list.popleft()
-
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    f"worklist: {len(self.work_list)}, "
+                    f"analysis list {len(self.analysis_list)}"
+                )
+            program_point1, program_point2 = self.work_list.pop()
+
+            names = None
+            if sys.delta_propagation:
+                names = self._flow_delta((program_point1, program_point2))
+                writes = self.transfer_writes(program_point1)
+                if names is None or writes is None:
+                    names = None
+                elif self.transfer_unchanged(program_point1, names, writes):
+                    continue
+                else:
+                    names |= writes
             transferred: State | BOTTOM = self.transfer(program_point1)
-            self._push_state_to(transferred, program_point2)
+            if sys.sparse_propagation:
+                self._define_temps(transferred, program_point1)
+            if sys.record_effects:
+                self.recorded_effects[program_point1] = transferred
+            if (
+                sys.function_summaries
+                and self.is_normal_call_point(program_point1)
+                and self.is_entry_point(program_point2)
+                and self._apply_summary(transferred, program_point1, program_point2)
+            ):
+                continue
+            self._push_state_to(transferred, program_point2, names)
+
+    # A function summary answers a call at program_point from the state at the
+    # exit of the callee, instead of walking the callee again with the frames
+    # of the caller. That's the case when
+    # - the arguments are included in the frame at the callee entry
+    # - no shared namespace grew since the entry state last changed
+    # - the callee hasn't read frames of its callers by nonlocal names
+    # - the exit has been reached
+    # The callee only writes frames of callers through shared namespaces, so
+    # its frame at the exit is put on top of the caller frames and passed to
+    # the return point.
+    def _apply_summary(
+        self,
+        state: State | BOTTOM,
+        program_point: ProgramPoint,
+        entry_point: ProgramPoint,
+    ) -> bool:
+        if is_bot_state(state):
+            return False
+        if self.summary_versions.get(entry_point) != SharedVersion.version:
+            return False
+        if entry_point in self.caller_readers:
+            return False
+        entry_state: State | BOTTOM = self.analysis_list.get(entry_point, BOTTOM)
+        if is_bot_state(entry_state):
+            return False
+        args = state._stack.top_frame().f_locals
+        entry_args = entry_state._stack.top_frame().f_locals
+        if getattr(args, POS_ARG_LEN, None) != getattr(entry_args, POS_ARG_LEN, None):
+            return False
+        Namespace.frozen = True
+        try:
+            if not args <= entry_args:
+                return False
+        except SharedNamespaceWriteError:
+            return False
+        finally:
+            Namespace.frozen = False
+
+        inter_flows = [
+            inter_flow
+            for inter_flow in self.inter_flows_by_call.get(program_point, ())
+            if inter_flow[1] == entry_point
+        ]
+        if not inter_flows:
+            return False
+        for _, _, exit_point, _ in inter_flows:
+            if is_bot_state(self.analysis_list.get(exit_point, BOTTOM)):
+                return False
+
+        self.summary_hits += 1
+        for _, _, exit_point, return_point in inter_flows:
+            effect: State = self.transfer(exit_point)
+            if sys.sparse_propagation:
+                self._define_temps(effect, exit_point)
+            callee_frame = effect._stack.top_frame()
+            return_state = copy_state(state, return_point)
+            stack = return_state.stack
+            stack.pop_frame()
+            stack.push_frame(
+                Frame(
+                    f_locals=deepcopy(callee_frame.f_locals),
+                    f_back=stack.top_frame(),
+                    f_globals=callee_frame.f_globals,
+                )
+            )
+            self._push_state_to(return_state, return_point)
+        return True
 
+    # Effects are computed when they're looked up, see EffectList. Only when
+    # they are logged, all of them are computed here.
     def present(self):
-        for program_point in list(self.analysis_list):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        for program_point, effect in self.analysis_effect_list.items():
             logger.info(
                 "Context at program point {}: {}".format(
-                    program_point, self.analysis_list[program_point]
+                    program_point, self.state_at(program_point)
                 )
             )
-            try:
-                self.analysis_effect_list[program_point] = self.transfer(program_point)
-                logger.info(
-                    "Effect at program point {}: {}".format(
-                        program_point, self.analysis_effect_list[program_point]
-                    )
-                )
-            except:
-                logger.critical(f"Program point {program_point}")
-
+            logger.info("Effect at program point {}: {}".format(program_point, effect))
         logger.info(self.heap)
 
+    # the state after the transfer at program_point, recorded during the last
+    # iteration if possible
+    def compute_effect(self, program_point: ProgramPoint) -> State | BOTTOM:
+        if program_point in self.recorded_effects:
+            return self.recorded_effects.pop(program_point)
+        effect = self.transfer(program_point)
+        if sys.sparse_propagation:
+            self._define_temps(effect, program_point)
+        return effect
+
     # based on current program point, update self.IF
     def detect_flow(self, program_point: ProgramPoint) -> None:
         if self.is_call_point(program_point):
-            stmt = self.get_stmt_by_point(program_point)
-            logger.debug(
-                f"Current lambda point: {program_point} {astor.to_source(stmt)}"
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                stmt = self.get_stmt_by_point(program_point)
+                logger.debug(
+                    f"Current lambda point: {program_point} {astor.to_source(stmt)}"
+                )
             # curr_state is the previous program point
-            next_state: State = self.analysis_list[program_point]
+            next_state: State = self.state_at(program_point)
             dummy_value: Value = Value()
-            next_next_state: State = deepcopy_state(next_state, program_point)
+            next_next_state: State = copy_state(next_state, program_point)
 
             # class definition
             if self.is_classdef_call_point(program_point):
@@ -208,7 +674,7 @@ class Analysis(AnalysisBase):
                 self._detect_flow_call(
                     program_point, next_state, next_next_state, dummy_value
                 )
-                next_next_class_state = deepcopy_state(next_state, program_point)
+                next_next_class_state = copy_state(next_state, program_point)
                 dummy_class_value = Value()
                 self._detect_flow_call_class(
                     program_point, next_state, next_next_class_state, dummy_class_value
@@ -238,7 +704,7 @@ class Analysis(AnalysisBase):
         call_lab, call_ctx = program_point
         entry_lab, exit_lab = self.add_sub_cfg(call_lab)
         ret_lab = self.get_classdef_return_label(call_lab)
-        self.inter_flows.add(
+        self.add_inter_flow(
             (
                 (call_lab, call_ctx),
                 (entry_lab, call_ctx),
@@ -267,17 +733,15 @@ class Analysis(AnalysisBase):
         entry_lab, exit_lab = type.tp_code
 
         # used by generator
-        tp_address = record(call_lab, call_ctx)
-
-        # a pure function has no receiver object. We employ the approach Mixed-CFA described in
-        # JSAI: A Static Analysis Platform for JavaScript
-        # new_ctx: Tuple = merge(call_lab, type.tp_address, call_ctx)
-        if sys.depth == 1:
-            new_ctx: Tuple = (call_lab,)
-        elif sys.depth == 2:
-            new_ctx: Tuple = type.tp_address + (call_lab,)
-        else:
-            raise NotImplementedError
+        tp_address = self.context_policy.record(call_lab, call_ctx)
+
+        new_ctx: int = self.context_policy.function_context(
+            call_lab, type.tp_address, call_ctx
+        )
+        # generator addresses are made of call sites, which coarser contexts
+        # would mix up
+        if not type.tp_generator:
+            new_ctx = self.context_policy.adapt(entry_lab, new_ctx)
         self.entry_program_point_info[(entry_lab, new_ctx)] = AdditionalEntryInfo(
             None,
             None,
@@ -293,7 +757,9 @@ class Analysis(AnalysisBase):
             (exit_lab, new_ctx),
             (ret_lab, call_ctx),
         )
-        self.inter_flows.add(inter_flow)
+        self.add_inter_flow(inter_flow)
+        if self.context_policy.limit:
+            self._retire_inter_flows(inter_flow)
 
     def _add_analysismethod_interflow(
         self, program_point: ProgramPoint, type: AnalysisMethod, ret_lab: int
@@ -304,10 +770,20 @@ class Analysis(AnalysisBase):
         # may be a class instance, may be a class
         instance: AnalysisInstance = type.tp_instance
         function: AnalysisFunction = type.tp_function
-        new_ctx: Tuple = merge(call_lab, instance.tp_address, call_ctx)
+        new_ctx: int = self.context_policy.method_context(
+            call_lab, instance.tp_address, call_ctx
+        )
+        new_ctx = self.context_policy.adapt(entry_lab, new_ctx)
+
+        instance_info: Value = type_2_value(instance)
+        # a coarser context may be shared by receivers
+        old_info = self.entry_program_point_info.get((entry_lab, new_ctx))
+        if self.context_policy.limit and old_info and old_info.instance_info:
+            if not instance_info <= old_info.instance_info:
+                instance_info.inject(old_info.instance_info)
 
         self.entry_program_point_info[(entry_lab, new_ctx)] = AdditionalEntryInfo(
-            type_2_value(instance),
+            instance_info,
             INIT_FLAG if self.is_class_init_call_point(program_point) else None,
             type.tp_module,
             function.tp_defaults,
@@ -321,7 +797,21 @@ class Analysis(AnalysisBase):
             (exit_lab, new_ctx),
             (ret_lab, call_ctx),
         )
-        self.inter_flows.add(inter_flow)
+        self.add_inter_flow(inter_flow)
+        if self.context_policy.limit:
+            self._retire_inter_flows(inter_flow)
+
+    # Once a function is coarsened, its call points stop feeding the finer
+    # contexts they used to enter it in. The states they already returned are
+    # kept, and the coarser context covers the calls from now on.
+    def _retire_inter_flows(self, inter_flow: InterFlow):
+        call_point, (entry_lab, _), _, _ = inter_flow
+        for old_inter_flow in list(self.inter_flows_by_call.get(call_point, ())):
+            old_entry_lab, old_ctx = old_inter_flow[1]
+            if old_entry_lab == entry_lab and self.context_policy.is_stale(
+                entry_lab, old_ctx
+            ):
+                self.remove_inter_flow(old_inter_flow)
 
     # find out implicit special methods of del statement
     def _detect_flow_del_magic(
@@ -506,7 +996,9 @@ class Analysis(AnalysisBase):
         elif isinstance(expr, ast.Yield):
             one_value = new_state.compute_value_of_expr(expr)
             # used by generators
-            return_value = new_state.stack.read_var(RETURN_FLAG)
+            # the stored value may be interned, so don't modify it in place
+            return_value = Value()
+            return_value.inject(new_state.stack.read_var(RETURN_FLAG))
             return_value.inject(one_value)
             new_state.stack.write_var(RETURN_FLAG, "local", return_value)
             # this return value is controlled by .send or just a None
@@ -525,7 +1017,9 @@ class Analysis(AnalysisBase):
         elif isinstance(expr, ast.Attribute):
             # compute receiver value
             lhs_value = new_state.compute_value_of_expr(expr.value)
-            descriptor_result = getattrs(lhs_value, expr.attr)
+            descriptor_result = self.cached_getattrs(
+                program_point, lhs_value, expr.attr
+            )
 
             # add flows of possible descriptors
             for descriptor in descriptor_result:
@@ -668,7 +1162,7 @@ class Analysis(AnalysisBase):
         assert isinstance(call_stmt, ast.Call), call_stmt
 
         call_lab, call_ctx = program_point
-        tp_address = record(call_lab, call_ctx)
+        tp_address = self.context_policy.record(call_lab, call_ctx)
         ret_lab, dummy_ret_lab = self.get_special_new_return_label(call_lab)
 
         value: Value = new_state.compute_value_of_expr(call_stmt.func)
@@ -709,7 +1203,7 @@ class Analysis(AnalysisBase):
         call_lab, call_ctx = program_point
         ret_lab, dummy_ret_lab = self.get_func_return_label(call_lab)
         # record
-        address = record(call_lab, call_ctx)
+        address = self.context_policy.record(call_lab, call_ctx)
 
         value: Value = new_state.compute_value_of_expr(call_stmt.func)
         # iterate all types to find which is callable
@@ -768,15 +1262,18 @@ class Analysis(AnalysisBase):
         self._push_state_to(new_state, (dummy_ret_lab, call_ctx))
 
     def transfer(self, program_point: ProgramPoint) -> State | BOTTOM:
-        stmt = self.get_stmt_by_point(program_point)
-        logger.info(f"Current program point1 {program_point} {astor.to_source(stmt)}")
+        if logger.isEnabledFor(logging.INFO):
+            stmt = self.get_stmt_by_point(program_point)
+            logger.info(
+                f"Current program point1 {program_point} {astor.to_source(stmt)}"
+            )
 
         # if old_state is BOTTOM, skip this transfer
-        old_state: State = self.analysis_list[program_point]
+        old_state: State = self.state_at(program_point)
         if is_bot_state(old_state):
             return BOTTOM
 
-        new_state: State = deepcopy_state(old_state, program_point)
+        new_state: State = copy_state(old_state, program_point)
         if self.is_dummy_point(program_point):
             return self.transfer_dummy(program_point, old_state, new_state)
         elif self.is_call_point(program_point):
@@ -789,6 +1286,74 @@ class Analysis(AnalysisBase):
             return self.transfer_return(program_point, old_state, new_state)
         return self.do_transfer(program_point, old_state, new_state)
 
+    # names of the top frame the transfer at program_point writes, None if it
+    # may change anything else, such as calls, definitions and imports do
+    def transfer_writes(self, program_point: ProgramPoint) -> Set[str] | None:
+        state: State | BOTTOM = self.state_at(program_point)
+        if is_bot_state(state) or not state._stack.frames:
+            return None
+        if self.is_dummy_point(program_point):
+            return set()
+        if (
+            self.is_call_point(program_point)
+            or self.is_entry_point(program_point)
+            or self.is_exit_point(program_point)
+            or self.is_return_point(program_point)
+        ):
+            return None
+
+        label, _ = program_point
+        stmt = self.get_stmt_by_point(program_point)
+        if isinstance(stmt, (ast.If, ast.While, ast.Break, ast.Continue)):
+            return set()
+        elif isinstance(stmt, ast.Pass):
+            if label in self.module_entry_labels or label in self.module_exit_labels:
+                return None
+            return set()
+        elif isinstance(stmt, ast.Return):
+            writes = {RETURN_FLAG}
+        elif isinstance(stmt, ast.Assign) and isinstance(
+            stmt.targets[0], (ast.Name, ast.List, ast.Tuple)
+        ):
+            writes = NameExtractor().build(stmt.targets[0])
+        else:
+            return None
+
+        # nonlocal and global names are written in other frames
+        f_locals = state._stack.top_frame().f_locals
+        for name in writes:
+            if f_locals.contains(name):
+                if not isinstance(f_locals.read_value(name), Value):
+                    return None
+        return writes
+
+    # whether the transfer at program_point gives the same state as the last
+    # time, given that only names changed since then
+    def transfer_unchanged(
+        self, program_point: ProgramPoint, names: Set[str], writes: Set[str]
+    ) -> bool:
+        # changes to other names go through
+        if not names <= writes:
+            return False
+        if not writes:
+            return True
+
+        # module frames write to namespaces shared by all states
+        f_locals = self.state_at(program_point)._stack.top_frame().f_locals
+        if not isinstance(f_locals, Namespace):
+            return False
+        stmt = self.get_stmt_by_point(program_point)
+        if isinstance(stmt.value, ast.Name):
+            # a local name which has not changed, global ones may change anytime
+            if stmt.value.id in names:
+                return False
+            return f_locals.contains(stmt.value.id) and isinstance(
+                f_locals.read_value(stmt.value.id), Value
+            )
+        return isinstance(
+            stmt.value, (ast.Num, ast.Str, ast.Bytes, ast.NameConstant, ast.Ellipsis)
+        )
+
     def transfer_dummy(
         self, program_point: ProgramPoint, old_state: State, new_state: State
     ):
@@ -933,7 +1498,9 @@ class Analysis(AnalysisBase):
             return new_state
         elif isinstance(call_expr, ast.Attribute):
             receiver_value = new_state.compute_value_of_expr(call_expr.value)
-            descriptor_result = getattrs(receiver_value, call_expr.attr)
+            descriptor_result = self.cached_getattrs(
+                program_point, receiver_value, call_expr.attr
+            )
             # if not descriptor_result.is_any():
             #     assert len(descriptor_result) <= 1
             for descriptor in descriptor_result:
@@ -1066,6 +1633,8 @@ class Analysis(AnalysisBase):
         if module_info:
             new_state.switch_global_namespace(module_info)
 
+        if sys.function_summaries:
+            setattr(new_stack.frames[-1].f_locals, ENTRY_POINT, program_point)
         if generator_info:
             setattr(new_stack.frames[-1].f_locals, GENERATOR, generator_info[0])
             setattr(new_stack.frames[-1].f_locals, GENERATOR_ADDRESS, generator_info[1])
@@ -1314,7 +1883,7 @@ class Analysis(AnalysisBase):
         # call_lab is the allocation label of this class
         call_lab = self.get_classdef_call_label(return_lab)
         # tp_address is an OS context
-        tp_address = record(call_lab, return_ctx)
+        tp_address = self.context_policy.record(call_lab, return_ctx)
         analysis_class: AnalysisClass = AnalysisClass(
             tp_uuid=call_lab,
             tp_module=module,
@@ -16,7 +16,6 @@ from __future__ import annotations
 
 import ast
 import sys
-from copy import deepcopy
 from types import FunctionType
 from typing import Tuple
 
@@ -36,6 +35,7 @@ from dmf.analysis.implicit_names import (
     MODULE_NAME_FLAG,
 )
 from dmf.analysis.namespace import Namespace
+from dmf.analysis.shared_version import SharedVersion
 from dmf.analysis.special_types import Any
 from dmf.analysis.typeshed_types import (
     TypeshedModule,
@@ -143,6 +143,9 @@ artificial_namespace.write_local_value("__name__", type_2_value(Str_Type()))
 
 # mimic object.__new__
 class Constructor:
+    # shared by all states, see Value.intern
+    tp_shared: bool = True
+
     def __init__(self):
         self.tp_uuid = "artificial.function.builtins.object.__new__"
         self.tp_class = Function_Type
@@ -613,6 +616,9 @@ _setup_Iterator_Type()
 
 
 class Analysis:
+    # states hold many instances, functions and methods, so they use slots
+    __slots__ = ()
+
     def __le__(self, other):
         return True
 
@@ -621,6 +627,8 @@ class Analysis:
 
 
 class AnalysisInstance(Analysis):
+    __slots__ = ("tp_uuid", "tp_address", "tp_class")
+
     def __init__(self, tp_address: Tuple, tp_class: AnalysisClass):
         self.tp_uuid: Tuple = tp_address
         self.tp_address: Tuple = tp_address
@@ -658,6 +666,20 @@ class AnalysisClass(Analysis):
         return self.tp_dict <= other.tp_dict
 
     def __iadd__(self, other: AnalysisClass):
+        if self.tp_dict is other.tp_dict:
+            return self
+        for var, value in other.tp_dict.items():
+            # joined in place, so nothing else can tell
+            old_value = dict.get(self.tp_dict, var)
+            if old_value is value:
+                continue
+            if (
+                old_value is None
+                or not isinstance(value, Value)
+                or not value <= old_value
+            ):
+                SharedVersion.bump()
+                break
         self.tp_dict += other.tp_dict
         return self
 
@@ -680,6 +702,9 @@ TypeshedModule.custom_getattr = _typeshedmodule_custom_getattr
 
 
 class AnalysisModule(Analysis):
+    # shared by all states, see Value.intern
+    tp_shared: bool = True
+
     def __init__(self, tp_name: str, tp_package: str, tp_code: Tuple):
         # tp_uuid is module name
         self.tp_uuid: str = tp_name
@@ -695,9 +720,9 @@ class AnalysisModule(Analysis):
         self.tp_address = (self.tp_code[0],)
 
     def __deepcopy__(self, memo):
-        new_tp_dict = deepcopy(self.tp_dict, memo)
-        self.tp_dict = new_tp_dict
-        return self
+        if id(self) not in memo:
+            memo[id(self)] = self
+        return memo[id(self)]
 
     def __le__(self, other: AnalysisModule):
         return True
@@ -728,6 +753,19 @@ sys.AnalysisModule = AnalysisModule
 
 
 class AnalysisFunction(Analysis):
+    __slots__ = (
+        "tp_uuid",
+        "tp_class",
+        "tp_code",
+        "tp_module",
+        "tp_dict",
+        "tp_defaults",
+        "tp_kwdefaults",
+        "tp_address",
+        "tp_generator",
+        "tp_name",
+    )
+
     def __init__(
         self,
         tp_uuid: int,
@@ -766,6 +804,8 @@ class AnalysisFunction(Analysis):
 
 
 class AnalysisMethod(Analysis):
+    __slots__ = ("tp_uuid", "tp_function", "tp_instance", "tp_module")
+
     def __init__(self, tp_function, tp_instance):
         self.tp_uuid = f"{tp_function.tp_uuid}-{tp_instance.tp_uuid}"
         # a function
@@ -12,12 +12,23 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 import sys
-from typing import Set, Tuple, Dict
+from collections import defaultdict
+from typing import Set, Tuple, Dict, List
 
 from dmf.flows import CFG, construct_CFG
 from dmf.flows.flows import BasicBlock
 
-ProgramPoint = Tuple[int, Tuple]
+# label and the index of its context, see ContextPolicy
+ProgramPoint = Tuple[int, int]
+InterFlow = Tuple[ProgramPoint, ProgramPoint, ProgramPoint, ProgramPoint]
+
+# kinds of call labels
+NORMAL_CALL = "normal"
+SPECIAL_INIT_CALL = "special_init"
+CLASSDEF_CALL = "classdef"
+RIGHT_MAGIC_CALL = "right_magic"
+LEFT_MAGIC_CALL = "left_magic"
+DEL_MAGIC_CALL = "del_magic"
 
 
 class AnalysisBase:
@@ -31,7 +42,13 @@ class AnalysisBase:
         return cfg
 
     def merge_cfg_info(self, cfg):
-        self.flows.update(cfg.flows)
+        # follow the order in which edges were created rather than the order
+        # of the set, which isn't preserved by the CFG cache
+        for flow in cfg.edges:
+            if flow in cfg.flows and flow not in self.flows:
+                self.flows.add(flow)
+                fst_lab, snd_lab = flow
+                self.flow_successors[fst_lab].append(snd_lab)
         self.blocks.update(cfg.blocks)
         self.sub_cfgs.update(cfg.sub_cfgs)
 
@@ -42,6 +59,26 @@ class AnalysisBase:
         self.magic_del_inter_flows.update(cfg.magic_del_inter_flows)
         self.special_init_flows.update(cfg.special_init_inter_flows)
 
+        # index inter-flows by their call label, so that label kinds and
+        # return labels can be looked up without scanning the sets above
+        for flows, records, kind in (
+            (cfg.call_return_inter_flows, self.call_return_records, NORMAL_CALL),
+            (cfg.classdef_inter_flows, self.classdef_records, CLASSDEF_CALL),
+            (cfg.magic_right_inter_flows, self.magic_right_records, RIGHT_MAGIC_CALL),
+            (cfg.magic_left_inter_flows, self.magic_left_records, LEFT_MAGIC_CALL),
+            (cfg.magic_del_inter_flows, self.magic_del_records, DEL_MAGIC_CALL),
+            (
+                cfg.special_init_inter_flows,
+                self.special_init_records,
+                SPECIAL_INIT_CALL,
+            ),
+        ):
+            for record in flows:
+                records[record[0]] = record
+                self.call_label_kinds[record[0]] = kind
+        for call_label, return_label in cfg.classdef_inter_flows:
+            self.classdef_return_to_call[return_label] = call_label
+
         self.dummy_labels.update(cfg.dummy_labels)
         self.call_labels.update(cfg.call_labels)
         self.return_labels.update(cfg.return_labels)
@@ -54,6 +91,8 @@ class AnalysisBase:
         self._setup()
 
         self.flows: Set[Tuple[int, int]] = set()
+        # label -> labels following it in self.flows
+        self.flow_successors: Dict[int, List[int]] = defaultdict(list)
         self.blocks: Dict[int, BasicBlock] = {}
         self.sub_cfgs: Dict[int, CFG] = {}
 
@@ -70,14 +109,53 @@ class AnalysisBase:
         self.magic_del_inter_flows = set()
         self.special_init_flows = set()
 
-        self.inter_flows: Set[
-            Tuple[ProgramPoint, ProgramPoint, ProgramPoint, ProgramPoint]
-        ] = set()
+        # call label -> kind of the call label
+        self.call_label_kinds: Dict[int, str] = {}
+        # call label -> inter-flow record starting at it
+        self.call_return_records: Dict[int, Tuple] = {}
+        self.classdef_records: Dict[int, Tuple] = {}
+        self.magic_right_records: Dict[int, Tuple] = {}
+        self.magic_left_records: Dict[int, Tuple] = {}
+        self.magic_del_records: Dict[int, Tuple] = {}
+        self.special_init_records: Dict[int, Tuple] = {}
+        # classdef return label -> classdef call label
+        self.classdef_return_to_call: Dict[int, int] = {}
+
+        self.inter_flows: Set[InterFlow] = set()
+        # call/entry/exit point -> inter-flows passing through it
+        self.inter_flows_by_call: Dict[ProgramPoint, List[InterFlow]] = defaultdict(
+            list
+        )
+        self.inter_flows_by_entry: Dict[ProgramPoint, List[InterFlow]] = defaultdict(
+            list
+        )
+        self.inter_flows_by_exit: Dict[ProgramPoint, List[InterFlow]] = defaultdict(
+            list
+        )
 
     def _setup(self):
         sys.synthesis_cfg = self.synthesis_cfg
         sys.merge_cfg_info = self.merge_cfg_info
 
+    def add_inter_flow(self, inter_flow: InterFlow):
+        if inter_flow in self.inter_flows:
+            return
+        self.inter_flows.add(inter_flow)
+        call_point, entry_point, exit_point, _ = inter_flow
+        self.inter_flows_by_call[call_point].append(inter_flow)
+        self.inter_flows_by_entry[entry_point].append(inter_flow)
+        self.inter_flows_by_exit[exit_point].append(inter_flow)
+
+    # entry and exit points stay known as such
+    def remove_inter_flow(self, inter_flow: InterFlow):
+        if inter_flow not in self.inter_flows:
+            return
+        self.inter_flows.remove(inter_flow)
+        call_point, entry_point, exit_point, _ = inter_flow
+        self.inter_flows_by_call[call_point].remove(inter_flow)
+        self.inter_flows_by_entry[entry_point].remove(inter_flow)
+        self.inter_flows_by_exit[exit_point].remove(inter_flow)
+
     def get_stmt_by_label(self, label: int):
         return self.blocks[label].stmt[0]
 
@@ -107,116 +185,74 @@ class AnalysisBase:
         return self.is_return_label(label)
 
     def is_normal_call_label(self, label):
-        for l1, *_ in self.call_return_inter_flows:
-            if label == l1:
-                return True
-        return False
+        return self.call_label_kinds.get(label) == NORMAL_CALL
 
     def is_normal_call_point(self, program_point: ProgramPoint):
         label, _ = program_point
         return self.is_normal_call_label(label)
 
     def is_special_init_call_label(self, label: int):
-        for call, *_ in self.special_init_flows:
-            if label == call:
-                return True
-        return False
+        return self.call_label_kinds.get(label) == SPECIAL_INIT_CALL
 
     def is_class_init_call_point(self, program_point: ProgramPoint):
         label, _ = program_point
         return self.is_special_init_call_label(label)
 
     def is_right_magic_call_label(self, label):
-        for call, *_ in self.magic_right_inter_flows:
-            if label == call:
-                return True
-        return False
+        return self.call_label_kinds.get(label) == RIGHT_MAGIC_CALL
 
     def is_right_magic_call_point(self, program_point: ProgramPoint):
         label, _ = program_point
         return self.is_right_magic_call_label(label)
 
     def is_del_magic_call_label(self, label):
-        for call, *_ in self.magic_del_inter_flows:
-            if label == call:
-                return True
-        return False
+        return self.call_label_kinds.get(label) == DEL_MAGIC_CALL
 
     def is_del_magic_call_point(self, program_point: ProgramPoint):
         label, _ = program_point
         return self.is_del_magic_call_label(label)
 
     def is_left_magic_call_label(self, label):
-        for call, *_ in self.magic_left_inter_flows:
-            if label == call:
-                return True
-        return False
+        return self.call_label_kinds.get(label) == LEFT_MAGIC_CALL
 
     def is_left_magic_call_point(self, program_point: ProgramPoint):
         label, _ = program_point
         return self.is_left_magic_call_label(label)
 
     def is_classdef_call_label(self, label: int):
-        for (
-            call,
-            *_,
-        ) in self.classdef_inter_flows:
-            if label == call:
-                return True
-        return False
+        return self.call_label_kinds.get(label) == CLASSDEF_CALL
 
     def is_classdef_call_point(self, program_point: ProgramPoint):
         label, _ = program_point
         return self.is_classdef_call_label(label)
 
     def is_entry_point(self, program_point: ProgramPoint):
-        for _, entry_point, _, _ in self.inter_flows:
-            if program_point == entry_point:
-                return True
-        return False
+        return program_point in self.inter_flows_by_entry
 
     def is_exit_point(self, program_point: ProgramPoint):
-        for _, _, exit_point, _ in self.inter_flows:
-            if program_point == exit_point:
-                return True
-        return False
+        return program_point in self.inter_flows_by_exit
 
     def get_classdef_call_label(self, label):
-        for call_label, return_label in self.classdef_inter_flows:
-            if label == return_label:
-                return call_label
-        raise KeyError
+        return self.classdef_return_to_call[label]
 
     def get_classdef_return_label(self, label):
-        for call_label, return_label in self.classdef_inter_flows:
-            if label == call_label:
-                return return_label
-        raise KeyError
+        _, return_label = self.classdef_records[label]
+        return return_label
 
     def get_right_magic_return_label(self, label):
-        for (
-            call_label,
-            return_label,
-            dummy_return_label,
-        ) in self.magic_right_inter_flows:
-            if label == call_label:
-                return return_label, dummy_return_label
-        raise KeyError
+        _, return_label, dummy_return_label = self.magic_right_records[label]
+        return return_label, dummy_return_label
 
     def get_del_magic_return_label(self, label):
-        for call_label, return_label, dummy_return_label in self.magic_del_inter_flows:
-            if label == call_label:
-                return return_label, dummy_return_label
-        raise KeyError
+        _, return_label, dummy_return_label = self.magic_del_records[label]
+        return return_label, dummy_return_label
 
     def get_left_magic_return_label(self, label):
-        for call_label, return_label, dummy_return_label in self.magic_left_inter_flows:
-            if label == call_label:
-                return return_label, dummy_return_label
-        raise KeyError
+        _, return_label, dummy_return_label = self.magic_left_records[label]
+        return return_label, dummy_return_label
 
     def get_special_new_return_label(self, label):
-        for (
+        (
             new,
             new_return,
             new_dummy_return,
@@ -228,13 +264,11 @@ class AnalysisBase:
             init_call_return,
             init_call_dummy_return,
             deleted_second_var,
-        ) in self.call_return_inter_flows:
-            if label == new:
-                return new_return, new_dummy_return
-        raise KeyError
+        ) = self.call_return_records[label]
+        return new_return, new_dummy_return
 
     def get_func_return_label(self, label):
-        for (
+        (
             new,
             new_return,
             new_dummy_return,
@@ -246,16 +280,12 @@ class AnalysisBase:
             init_call_return,
             init_call_dummy_return,
             deleted_second_var,
-        ) in self.call_return_inter_flows:
-            if label == new:
-                return init_call_return, init_call_dummy_return
-        raise KeyError
+        ) = self.call_return_records[label]
+        return init_call_return, init_call_dummy_return
 
     def get_special_init_return_label(self, label):
-        for l1, l2, l3 in self.special_init_flows:
-            if label == l1:
-                return l2, l3
-        raise KeyError
+        _, l2, l3 = self.special_init_records[label]
+        return l2, l3
 
     def add_sub_cfg(self, lab: int):
         cfg: CFG = self.sub_cfgs[lab]
@@ -276,9 +306,8 @@ class AnalysisBase:
     def DELTA_basic_flow(self, program_point: ProgramPoint):
         added = []
         label, context = program_point
-        for fst_lab, snd_lab in self.flows:
-            if label == fst_lab:
-                added.append(((label, context), (snd_lab, context)))
+        for snd_lab in self.flow_successors.get(label, ()):
+            added.append(((label, context), (snd_lab, context)))
         return added
 
     def DELTA_call_flow(self, program_point: ProgramPoint):
@@ -288,10 +317,9 @@ class AnalysisBase:
             entry_point,
             exit_point,
             return_point,
-        ) in self.inter_flows:
-            if program_point == call_point:
-                added.append((call_point, entry_point))
-                added.append((exit_point, return_point))
+        ) in self.inter_flows_by_call.get(program_point, ()):
+            added.append((call_point, entry_point))
+            added.append((exit_point, return_point))
         return added
 
     def DELTA_exit_flow(self, program_point):
@@ -301,7 +329,6 @@ class AnalysisBase:
             _,
             exit_point,
             return_point,
-        ) in self.inter_flows:
-            if program_point == exit_point:
-                added.append((exit_point, return_point))
+        ) in self.inter_flows_by_exit.get(program_point, ()):
+            added.append((exit_point, return_point))
         return added
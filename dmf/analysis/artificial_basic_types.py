@@ -21,6 +21,9 @@ from dmf.log.logger import logger
 
 
 class Artificial:
+    # shared by all states, see Value.intern
+    tp_shared: bool = True
+
     def __le__(self, other):
         return True
 
@@ -13,6 +13,7 @@
 #  limitations under the License.
 import builtins
 import sys
+from functools import lru_cache
 from types import FunctionType
 
 from dmf.analysis.analysis_types import (
@@ -34,6 +35,7 @@ from dmf.analysis.artificial_basic_types import (
 )
 from dmf.analysis.gets_sets import analysis_getattr
 from dmf.analysis.special_types import Any
+from dmf.analysis.typeshed import default_search_context, get_stdlib_modules
 from dmf.analysis.typeshed_types import (
     import_a_module_from_typeshed,
     TypeshedFunction,
@@ -291,24 +293,41 @@ def _resolve_name(name, package, level):
     return "{}.{}".format(base, name) if name else base
 
 
-def import_a_module(name, package=None, level=0) -> Value:
-    import isort
+FUTURE = "FUTURE"
+STDLIB = "STDLIB"
+FIRSTPARTY = "FIRSTPARTY"
+THIRDPARTY = "THIRDPARTY"
+
+
+# import statements are visited again and again during the fixed point
+# computation, so the category of a module is only computed once
+@lru_cache(maxsize=None)
+def place_module(name: str) -> str:
+    top_level_name = name.partition(".")[0]
+    if top_level_name == "__future__":
+        return FUTURE
+    elif top_level_name in get_stdlib_modules(default_search_context.typeshed):
+        return STDLIB
+    elif name.startswith(sys.first_party):
+        return FIRSTPARTY
+    else:
+        return THIRDPARTY
+
 
+def import_a_module(name, package=None, level=0) -> Value:
     value = Value()
-    category = isort.place_module(name)
-    # DEFAULT: Tuple[str, ...] = (FUTURE, STDLIB, THIRDPARTY, FIRSTPARTY, LOCALFOLDER)
-    if category == "FUTURE":
+    category = place_module(name)
+    if category == FUTURE:
         module = Value.make_any()
-    elif category == "STDLIB":
+    elif category == STDLIB:
         if name == "typing" or name == "typing_extensions":
             module = Value.make_any()
         else:
             module = import_a_module_from_typeshed(name)
+    elif category == FIRSTPARTY:
+        module = import_module(name)
     else:
-        if not name.startswith(sys.first_party):
-            return Value.make_any()
-        else:
-            module = import_module(name)
+        return Value.make_any()
 
     value.inject(module)
     return value
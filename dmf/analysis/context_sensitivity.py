@@ -15,28 +15,129 @@
 """
 In this thesis we are gonna use object sensitivity.
 """
-import sys
-from typing import Tuple
-
-# The context grows from left to right, since in this way it's simpler to implement in Python.
-
-
-def record(heap: int, ctx: Tuple) -> Tuple:
-    """
-    record to create new heap context
-    :param heap: allocation site label
-    :param ctx:  context
-    :return: new heap context
-    """
-    # return ctx[-1:] + (heap,)
-    return (heap,)
-
-
-def merge(heap: int, hctx: Tuple, ctx: Tuple) -> Tuple:
-    # return hctx[-2:]
-    if sys.depth == 1:
-        return hctx[-1:]
-    elif sys.depth == 2:
-        return hctx[-2:]
-    else:
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+# Contexts grow from left to right and keep their last depth elements. They
+# are interned, program points hold the index of their context.
+
+# the context of modules and the main program
+EMPTY_CONTEXT = 0
+
+
+class ContextPolicy:
+    def __init__(self, depth: int, limit: int = 0):
+        if depth < 1:
+            raise NotImplementedError(depth)
+        self.depth: int = depth
+        # index -> context, and the other way round
+        self.contexts: List[Tuple] = [()]
+        self.context_ids: Dict[Tuple, int] = {(): EMPTY_CONTEXT}
+
+        # Introspective mode, a function analysed in more than limit contexts
+        # is coarsened by dropping the oldest element of its new contexts,
+        # down to the empty context. 0 turns it off.
+        self.limit: int = limit
+        # entry label -> number of elements kept in its contexts
+        self.lengths: Dict[int, int] = {}
+        # entry label -> contexts seen since it was last coarsened
+        self.entry_contexts: Dict[int, Set[int]] = defaultdict(set)
+
+    def intern(self, ctx: Tuple) -> int:
+        ctx_id = self.context_ids.get(ctx)
+        if ctx_id is None:
+            ctx_id = self.context_ids[ctx] = len(self.contexts)
+            self.contexts.append(ctx)
+        return ctx_id
+
+    def context(self, ctx_id: int) -> Tuple:
+        return self.contexts[ctx_id]
+
+    def record(self, heap: int, ctx_id: int) -> Tuple:
+        """
+        record to create new heap context
+        :param heap: allocation site label
+        :param ctx_id:  context
+        :return: new heap context
+        """
+        return (self.contexts[ctx_id] + (heap,))[-self.depth :]
+
+    # context of a function called at call_lab
+    def function_context(self, call_lab: int, tp_address: Tuple, ctx_id: int) -> int:
+        raise NotImplementedError
+
+    # context of a method called at call_lab on a receiver allocated at
+    # tp_address
+    def method_context(self, call_lab: int, tp_address: Tuple, ctx_id: int) -> int:
         raise NotImplementedError
+
+    # the context a function entered at entry_lab is analysed in
+    def adapt(self, entry_lab: int, ctx_id: int) -> int:
+        if not self.limit:
+            return ctx_id
+
+        length = self.lengths.get(entry_lab, self.depth)
+        ctx = self.contexts[ctx_id]
+        if len(ctx) > length:
+            ctx_id = self.intern(ctx[len(ctx) - length :])
+        seen = self.entry_contexts[entry_lab]
+        if ctx_id not in seen:
+            if len(seen) >= self.limit and length > 0:
+                self.lengths[entry_lab] = length - 1
+                seen.clear()
+                return self.adapt(entry_lab, ctx_id)
+            seen.add(ctx_id)
+        return ctx_id
+
+    # a context finer than those the function is analysed in now
+    def is_stale(self, entry_lab: int, ctx_id: int) -> bool:
+        length = self.lengths.get(entry_lab, self.depth)
+        return len(self.contexts[ctx_id]) > length
+
+    # entry labels of functions analysed in coarser contexts
+    def coarsened(self) -> List[int]:
+        return [
+            entry_lab
+            for entry_lab, length in self.lengths.items()
+            if length < self.depth
+        ]
+
+    def _call_site_context(self, call_lab: int, ctx_id: int) -> int:
+        return self.intern((self.contexts[ctx_id] + (call_lab,))[-self.depth :])
+
+
+class ObjectSensitivity(ContextPolicy):
+    # a pure function has no receiver object. We employ the approach Mixed-CFA
+    # described in JSAI: A Static Analysis Platform for JavaScript
+    def function_context(self, call_lab: int, tp_address: Tuple, ctx_id: int) -> int:
+        return self.intern((tp_address + (call_lab,))[-self.depth :])
+
+    def method_context(self, call_lab: int, tp_address: Tuple, ctx_id: int) -> int:
+        return self.intern(tp_address[-self.depth :])
+
+
+class CallSiteSensitivity(ContextPolicy):
+    def function_context(self, call_lab: int, tp_address: Tuple, ctx_id: int) -> int:
+        return self._call_site_context(call_lab, ctx_id)
+
+    def method_context(self, call_lab: int, tp_address: Tuple, ctx_id: int) -> int:
+        return self._call_site_context(call_lab, ctx_id)
+
+
+# call sites for functions, receivers for methods
+class HybridSensitivity(ObjectSensitivity):
+    def function_context(self, call_lab: int, tp_address: Tuple, ctx_id: int) -> int:
+        return self._call_site_context(call_lab, ctx_id)
+
+
+context_policies = {
+    "object": ObjectSensitivity,
+    "call-site": CallSiteSensitivity,
+    "hybrid": HybridSensitivity,
+}
+
+
+def make_context_policy(sensitivity: str, depth: int, limit: int = 0) -> ContextPolicy:
+    if sensitivity not in context_policies:
+        raise NotImplementedError(sensitivity)
+    return context_policies[sensitivity](depth, limit)
@@ -0,0 +1,170 @@
+#  Copyright 2022 Layne Liu
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# Def-use chains of the temporaries (_var1, _var2, ...) the CFG flattens
+# expressions into. A temporary is only ever read in the scope defining it,
+# so its values can flow from definitions to uses directly, see
+# sys.sparse_propagation in Analysis.
+
+from __future__ import annotations
+
+import ast
+from collections import defaultdict, namedtuple
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from dmf.analysis.name_extractor import NameExtractor
+from dmf.flows import CFG
+
+# label -> temporaries the label defines
+# label -> temporary -> labels of the definitions reaching a use at the label
+TempDefUse = namedtuple("TempDefUse", ["defs", "reaching"])
+
+# fields of statements which are not evaluated at their own labels
+BODY_FIELDS = ("body", "orelse", "finalbody", "handlers")
+
+
+def is_temp_name(name: str) -> bool:
+    # implicit names such as _var_return_flag are not temporaries
+    return name.startswith("_var") and name[4:].isdigit()
+
+
+def temp_uses(node: ast.AST) -> Set[str]:
+    uses = set()
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, ast.Name):
+            if is_temp_name(node.id):
+                uses.add(node.id)
+            continue
+        for field, child in ast.iter_fields(node):
+            if field in BODY_FIELDS:
+                continue
+            if isinstance(child, ast.AST):
+                nodes.append(child)
+            elif isinstance(child, list):
+                nodes.extend(elt for elt in child if isinstance(elt, ast.AST))
+    return uses
+
+
+# The temporaries written to the top frame by the transfer at a label, and
+# those it kills. Dummy return labels get the value of a call written by
+# detect_flow as well, so they define without killing.
+def label_def_kill(cfg: CFG, label: int, stmt: ast.AST) -> Tuple[Set[str], Set[str]]:
+    if label in cfg.dummy_labels:
+        if isinstance(stmt, ast.Name) and is_temp_name(stmt.id):
+            return {stmt.id}, set()
+        return set(), set()
+    if label in cfg.call_labels:
+        return set(), set()
+
+    if label in cfg.return_labels:
+        if isinstance(stmt, ast.Name):
+            names = {stmt.id}
+        elif isinstance(stmt, ast.ClassDef):
+            names = {stmt.name}
+        else:
+            names = set()
+    elif isinstance(stmt, ast.Assign) and isinstance(
+        stmt.targets[0], (ast.Name, ast.List, ast.Tuple)
+    ):
+        names = NameExtractor().build(stmt.targets[0])
+    elif isinstance(stmt, ast.FunctionDef):
+        names = {stmt.name}
+    elif isinstance(stmt, ast.Delete) and isinstance(stmt.targets[0], ast.Name):
+        names = {stmt.targets[0].id}
+        return set(), {name for name in names if is_temp_name(name)}
+    else:
+        names = set()
+    names = {name for name in names if is_temp_name(name)}
+    return names, names
+
+
+# calls whose results detect_flow writes straight to a dummy return label
+def dummy_edges(cfg: CFG) -> List[Tuple[int, int]]:
+    edges = []
+    for flows in (
+        cfg.magic_right_inter_flows,
+        cfg.magic_left_inter_flows,
+        cfg.magic_del_inter_flows,
+        cfg.special_init_inter_flows,
+    ):
+        for call_label, _, dummy_label in flows:
+            edges.append((call_label, dummy_label))
+    for record in cfg.call_return_inter_flows:
+        call_label, _, new_dummy_label = record[:3]
+        init_dummy_label = record[9]
+        edges.append((call_label, new_dummy_label))
+        edges.append((call_label, init_dummy_label))
+    return edges
+
+
+# Reaching definitions of temporaries, restricted to the labels using them.
+def temp_def_use(cfg: CFG) -> TempDefUse:
+    successors: Dict[int, List[int]] = defaultdict(list)
+    for fst_lab, snd_lab in list(cfg.edges) + dummy_edges(cfg):
+        successors[fst_lab].append(snd_lab)
+
+    defs: Dict[int, FrozenSet[str]] = {}
+    kills: Dict[int, FrozenSet[str]] = {}
+    uses: Dict[int, Set[str]] = {}
+    for label, block in cfg.blocks.items():
+        if not block.stmt:
+            continue
+        stmt = block.stmt[0]
+        gen, kill = label_def_kill(cfg, label, stmt)
+        if gen:
+            defs[label] = frozenset(gen)
+        if kill:
+            kills[label] = frozenset(kill)
+        if label in cfg.dummy_labels:
+            continue
+        # return labels bind the name they hold, class definitions read bases
+        if isinstance(stmt, ast.Delete) or (
+            label in cfg.return_labels and isinstance(stmt, ast.Name)
+        ):
+            continue
+        names = temp_uses(stmt) - defs.get(label, frozenset())
+        if names:
+            uses[label] = names
+
+    # temporary -> labels of reaching definitions, at the start of each label
+    entry: Dict[int, Dict[str, FrozenSet[int]]] = defaultdict(dict)
+    work_list = [cfg.start_block.bid]
+    reached = {cfg.start_block.bid}
+    while work_list:
+        label = work_list.pop()
+        out = dict(entry[label])
+        for name in kills.get(label, ()):
+            out.pop(name, None)
+        for name in defs.get(label, ()):
+            out[name] = out.get(name, frozenset()) | {label}
+        for succ in successors.get(label, ()):
+            succ_entry = entry[succ]
+            changed = succ not in reached
+            for name, labels in out.items():
+                old = succ_entry.get(name, frozenset())
+                if not labels <= old:
+                    succ_entry[name] = old | labels
+                    changed = True
+            if changed:
+                reached.add(succ)
+                work_list.append(succ)
+
+    reaching: Dict[int, Dict[str, FrozenSet[int]]] = {}
+    for label, names in uses.items():
+        reaching[label] = {
+            name: entry[label][name] for name in names if name in entry[label]
+        }
+    return TempDefUse(defs, reaching)
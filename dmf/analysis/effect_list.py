@@ -0,0 +1,78 @@
+#  Copyright 2022 Layne Liu
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from typing import Dict, Set
+
+from dmf.analysis.analysisbase import ProgramPoint
+from dmf.analysis.state import State
+from dmf.log.logger import logger
+
+
+# Program point -> effect, that is the state after the transfer at it. An
+# effect is computed the first time it's looked up, iterating computes all of
+# them, leaving out the program points whose effects can't be computed.
+class EffectList(MutableMapping):
+    def __init__(self, analysis):
+        self.analysis = analysis
+        self.effects: Dict[ProgramPoint, State] = {}
+        # program points deleted or whose effects can't be computed
+        self.dropped: Set[ProgramPoint] = set()
+
+    def __getitem__(self, program_point: ProgramPoint) -> State:
+        if program_point in self.effects:
+            return self.effects[program_point]
+        if program_point in self.dropped or not self.analysis.is_program_point(
+            program_point
+        ):
+            raise KeyError(program_point)
+
+        try:
+            effect = self.analysis.compute_effect(program_point)
+        except Exception:
+            logger.critical(f"Program point {program_point}")
+            self.dropped.add(program_point)
+            raise KeyError(program_point)
+        self.effects[program_point] = effect
+        return effect
+
+    def __setitem__(self, program_point: ProgramPoint, effect: State):
+        self.effects[program_point] = effect
+        self.dropped.discard(program_point)
+
+    def __delitem__(self, program_point: ProgramPoint):
+        if program_point not in self:
+            raise KeyError(program_point)
+        self.effects.pop(program_point, None)
+        self.dropped.add(program_point)
+
+    def __contains__(self, program_point) -> bool:
+        if program_point in self.effects:
+            return True
+        try:
+            self[program_point]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        program_points = self.analysis.program_points() + list(self.effects)
+        for program_point in dict.fromkeys(program_points):
+            if program_point in self:
+                yield program_point
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -35,3 +35,7 @@ class ParsingDefaultsError(Exception):
 
 class ParsingKwDefaultsError(Exception):
     pass
+
+
+class SharedNamespaceWriteError(Exception):
+    pass
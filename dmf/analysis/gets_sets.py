@@ -14,6 +14,8 @@
 from __future__ import annotations
 
 import sys
+from collections import namedtuple
+from typing import Dict, Tuple
 
 from dmf.analysis.analysis_types import (
     AnalysisInstance,
@@ -35,6 +37,7 @@ from dmf.analysis.artificial_basic_types import (
     ArtificialFunction,
     ArtificialMethod,
 )
+from dmf.analysis.shared_version import SharedVersion
 from dmf.analysis.special_types import Any
 from dmf.analysis.typeshed_types import (
     TypeshedModule,
@@ -55,34 +58,68 @@ def _pytype_lookup(obj_type, name, mros=None) -> Value:
     return res
 
 
+# Where a name was found along the mros of a class: the dicts holding it, or
+# None if an Any class was met first. Values are read from the dicts on every
+# lookup, so only binding or deleting names invalidates it, which is told by
+# the versions of the dicts probed.
+MroLookup = namedtuple("MroLookup", ["obj_type", "mros", "probed", "holders"])
+
+# (class uuid, name) -> MroLookup
+mro_lookup_cache: Dict[Tuple[str, str], MroLookup] = {}
+
+
 def _find_name_in_mro(obj_type, name, mros=None) -> Value:
-    all_mro_value = Value()
     if mros is not None:
         tp_mros = mros
     else:
         tp_mros = obj_type.tp_mro
 
+    key = (obj_type.tp_uuid, name)
+    lookup = mro_lookup_cache.get(key)
+    if (
+        lookup is None
+        or lookup.obj_type is not obj_type
+        or lookup.mros is not tp_mros
+        or any(tp_dict.version != version for tp_dict, version in lookup.probed)
+    ):
+        lookup = mro_lookup_cache[key] = _lookup_name_in_mro(obj_type, name, tp_mros)
+
+    if SharedVersion.reads is not None:
+        SharedVersion.reads.extend(lookup.probed)
+    if lookup.holders is None:
+        return Value.make_any()
+    all_mro_value = Value()
+    for tp_dict in lookup.holders:
+        all_mro_value.inject(tp_dict.read_value(name))
+    return all_mro_value
+
+
+def _lookup_name_in_mro(obj_type, name, tp_mros) -> MroLookup:
+    probed = []
+    holders = []
     for tp_mro in tp_mros:
         for cls in tp_mro:
             if cls is Any:
-                return Value.make_any()
+                return MroLookup(obj_type, tp_mros, tuple(probed), None)
             else:
                 # tp_dict could belong to AnalysisClass, ArtificialClass and
                 # TypeshedClass
+                probed.append((cls.tp_dict, cls.tp_dict.version))
                 if not cls.tp_dict.contains(name):
                     if hasattr(cls, "tp_fallback"):
                         fallback_clses = cls.tp_fallback
                         one_fallback = fallback_clses.extract_1_elt()
+                        probed.append(
+                            (one_fallback.tp_dict, one_fallback.tp_dict.version)
+                        )
                         if one_fallback.tp_dict.contains(name):
-                            curr_mro_value = one_fallback.tp_dict.read_value(name)
-                            all_mro_value.inject(curr_mro_value)
+                            holders.append(one_fallback.tp_dict)
                             break
                 else:
-                    curr_mro_value = cls.tp_dict.read_value(name)
-                    all_mro_value.inject(curr_mro_value)
+                    holders.append(cls.tp_dict)
                     break
 
-    return all_mro_value
+    return MroLookup(obj_type, tp_mros, tuple(probed), holders)
 
 
 # simulate builtins.getattr, but operate on a set of objects
@@ -429,6 +466,9 @@ def analysis_setattr(obj, name: str, value: Value | None) -> Value:
     if isinstance(obj, AnalysisInstance):
         return GenericSetAttr(obj, name, value)
     elif isinstance(obj, AnalysisClass):
+        # class dicts are namespaces of frames, which don't keep versions
+        SharedVersion.bump()
+        obj.tp_dict.bump_version()
         return type_setattro(obj, name, value)
     elif isinstance(obj, AnalysisFunction):
         obj.tp_dict.write_local_value(name, value)
@@ -16,6 +16,7 @@ from __future__ import annotations
 from typing import Dict, Tuple
 
 from dmf.analysis.heap_namespace import SizedHeapNamespace
+from dmf.analysis.shared_version import SharedVersion
 
 
 class Heap:
@@ -37,7 +38,10 @@ class Heap:
         if item not in self.singletons:
             default_value = self.__missing__(item)
             self.singletons[item] = default_value
-        return self.singletons[item]
+        value = self.singletons[item]
+        if SharedVersion.reads is not None:
+            SharedVersion.record(value)
+        return value
 
     def __repr__(self):
         return "heaps: {}".format(self.singletons)
@@ -12,6 +12,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 from __future__ import annotations
+from dmf.analysis.shared_version import SharedVersion
 from dmf.analysis.special_types import Any
 from dmf.analysis.value import Value
 
@@ -22,6 +23,8 @@ class HeapNamespace(dict):
 
 class SizedHeapNamespace:
     threshold = 10
+    # see SharedVersion
+    version: int = 0
 
     def threshold_check(self):
         if self.types is Any:
@@ -65,7 +68,11 @@ class SizedHeapNamespace:
         new_value.inject(value)
         if name in self.types:
             old_value = self.types[name]
+            if not value <= old_value:
+                SharedVersion.bump(self)
             new_value.inject(old_value)
+        else:
+            SharedVersion.bump(self)
         self.types[name] = new_value
         self.threshold_check()
 
@@ -74,6 +81,8 @@ class SizedHeapNamespace:
         if self.types is Any:
             return
 
+        if name not in self.types or not value <= self.types[name] <= value:
+            SharedVersion.bump(self)
         new_value = Value()
         new_value.inject(value)
         self.types[name] = new_value
@@ -22,6 +22,8 @@ MODULE_PACKAGE_FLAG = "_var_module_package_flag"
 MODULE_NAME_FLAG = "_var_module_name_flag"
 GENERATOR = "tp_generator"
 GENERATOR_ADDRESS = "tp_generator_address"
+# entry point of the function a frame belongs to, with sys.function_summaries
+ENTRY_POINT = "tp_entry_point"
 numeric_methods = {
     ast.Add: "__add__",
     ast.Sub: "__sub__",
@@ -13,26 +13,33 @@
 #  limitations under the License.
 from __future__ import annotations
 
+import itertools
 import sys
 
-from dmf.analysis.symbol_table import Var, NonlocalVar, GlobalVar, LocalVar, SymbolTable
+from dmf.analysis.exceptions import SharedNamespaceWriteError
+from dmf.analysis.symbol_table import NonlocalVar, GlobalVar, LocalVar, SymbolTable
 from dmf.analysis.value import Value
 
 
 class Namespace(SymbolTable):
+    # set while comparing against a state whose stack is still shared with
+    # its copies, so that __le__ can't fill in missing names there
+    frozen: bool = False
+    # bumped whenever a name is bound or deleted, or the namespace is joined
+    # in place, not when a name is simply written. Class dicts are also bumped
+    # when they grow, see AnalysisClass. Versions are drawn from one counter,
+    # so no two changes give the same one. See the caches in gets_sets and
+    # sys.inline_caches in Analysis
+    version: int = 0
+    versions = itertools.count(1)
+
     def __contains__(self, item):
         if isinstance(item, str):
             raise NotImplementedError
         return super().__contains__(item)
 
     def contains(self, name: str):
-        if (
-            LocalVar(name) in self
-            or NonlocalVar(name) in self
-            or GlobalVar(name) in self
-        ):
-            return True
-        return False
+        return dict.__contains__(self, name)
 
     def __repr__(self):
         filtered_dict = {
@@ -41,48 +48,55 @@ class Namespace(SymbolTable):
         return repr(filtered_dict)
 
     def __missing__(self, key):
+        if Namespace.frozen:
+            raise SharedNamespaceWriteError(key)
+        self.bump_version()
         self[key] = value = Value.make_any()
         return value
 
     def __le__(self, other):
+        if self is other:
+            return True
         for var in self:
             if not self[var] <= other[var]:
                 return False
         return True
 
     def __iadd__(self, other):
+        if self is other:
+            return self
         for var in other:
             self[var] += other[var]
+        self.bump_version()
         return self
 
-    def read_var_type(self, name: str) -> Var:
-        if LocalVar(name) in self:
-            return LocalVar(name)
-        if NonlocalVar(name) in self:
-            return NonlocalVar(name)
-        if GlobalVar(name) in self:
-            return GlobalVar(name)
-
-        raise AttributeError(name)
-
-    def read_value(self, name: str) -> Value:
-        if LocalVar(name) in self:
-            return self[LocalVar(name)]
-        if NonlocalVar(name) in self:
-            return self[NonlocalVar(name)]
-        if GlobalVar(name) in self:
-            return self[GlobalVar(name)]
-        raise AttributeError(name)
+    def bump_version(self):
+        self.version = next(Namespace.versions)
+
+    # the value of a local name, or the namespace owning a nonlocal or
+    # global name
+    def read_value(self, name: str) -> Value | Namespace:
+        value = dict.get(self, name)
+        if value is None:
+            raise AttributeError(name)
+        return value
 
     def write_local_value(self, name: str, value: Value):
         assert isinstance(value, Value), value
+        if not dict.__contains__(self, name):
+            self.bump_version()
         self[LocalVar(name)] = value
 
     def write_nonlocal_value(self, name: str, ns: Namespace):
+        if not dict.__contains__(self, name):
+            self.bump_version()
         self[NonlocalVar(name)] = ns
 
     def write_global_value(self, name: str, ns: Namespace):
+        if not dict.__contains__(self, name):
+            self.bump_version()
         self[GlobalVar(name)] = ns
 
     def del_local_var(self, name: str):
-        del self[LocalVar(name)]
+        dict.__delitem__(self, name)
+        self.bump_version()
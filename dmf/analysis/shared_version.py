@@ -0,0 +1,38 @@
+#  Copyright 2022 Layne Liu
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+# Namespaces shared by all states, such as module, function and class dicts
+# and heap objects, are updated in place. Their version tells whether any of
+# them grew since, see sys.function_summaries in Analysis.
+class SharedVersion:
+    version: int = 0
+    # while not None, the shared namespaces read and their versions, see
+    # sys.inline_caches in Analysis
+    reads: List[Tuple[object, int]] | None = None
+
+    # the namespace changed, if given, takes the new version as its own
+    @classmethod
+    def bump(cls, namespace=None):
+        cls.version += 1
+        if namespace is not None:
+            namespace.version = cls.version
+
+    @classmethod
+    def record(cls, namespace):
+        if cls.reads is not None:
+            cls.reads.append((namespace, namespace.version))
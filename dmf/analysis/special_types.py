@@ -27,6 +27,10 @@ class _TypeAny:
     def __repr__(self):
         return "Any"
 
+    # pickle as a reference to the Any below
+    def __reduce__(self):
+        return "Any"
+
     def __le__(self, other):
         return True
 
@@ -18,10 +18,11 @@ import sys
 from typing import List
 
 from dmf.analysis.analysis_types import artificial_namespace
+from dmf.analysis.implicit_names import ENTRY_POINT
 from dmf.analysis.namespace import (
     Namespace,
 )
-from dmf.analysis.symbol_table import Var, LocalVar, SymbolTable
+from dmf.analysis.symbol_table import Var, SymbolTable
 from dmf.analysis.union_namespace import UnionNamespace
 from dmf.analysis.value import Value
 
@@ -38,6 +39,8 @@ f_builtins1 = artificial_namespace
 
 
 class Frame:
+    __slots__ = ("f_locals", "f_back", "f_globals")
+
     def __init__(self, *, f_locals, f_back, f_globals):
         self.f_locals: Namespace[Var, Value] = f_locals
         self.f_back: Frame | None = f_back
@@ -81,19 +84,21 @@ class Frame:
 
         raise AttributeError(name)
 
+    # a local name is bound to its value, while a nonlocal or global name is
+    # bound to the namespace owning it
     def _read_local_namespace(self, name: str) -> Value:
         if self.f_locals.contains(name):
-            var = self.f_locals.read_var_type(name)
-            if isinstance(var, LocalVar):
-                return self.f_locals.read_value(name)
+            val = self.f_locals.read_value(name)
+            if isinstance(val, Value):
+                return val
             else:
-                val = self.f_locals.read_value(name)
                 assert isinstance(val, Namespace)
                 return val.read_value(name)
         raise AttributeError
 
     # find one with (var_name, local)
     def _read_nonlocal_namespace(self, name: str) -> Value:
+        frame: Frame = self
         parent_frame: Frame = self.f_back
         while (
             # not the last frame
@@ -103,16 +108,22 @@ class Frame:
             # parent_frame.f_locals itself should not be module namespace
             and parent_frame.f_locals is not self.f_globals
         ):
+            if sys.function_summaries:
+                frame._read_callers()
             if parent_frame.f_locals.contains(name):
-                var = parent_frame.f_locals.read_var_type(name)
-                if isinstance(var, LocalVar):
-                    return parent_frame.f_locals.read_value(name)
-                else:
-                    parent_frame = parent_frame.f_back
-            else:
-                parent_frame = parent_frame.f_back
+                val = parent_frame.f_locals.read_value(name)
+                if isinstance(val, Value):
+                    return val
+            frame, parent_frame = parent_frame, parent_frame.f_back
         raise AttributeError(name)
 
+    # the function of this frame reads the frames of its callers, so they
+    # can't be left out of its summaries
+    def _read_callers(self):
+        entry_point = getattr(self.f_locals, ENTRY_POINT, None)
+        if entry_point is not None:
+            sys.analysis.caller_readers.add(entry_point)
+
     def _read_global_namespace(self, name: str) -> Value:
         if self.f_globals.contains(name):
             return self.f_globals.read_value(name)
@@ -129,11 +140,10 @@ class Frame:
 
     def write_var(self, name: str, scope: str, value: Value):
         if self.f_locals.contains(name):
-            var = self.f_locals.read_var_type(name)
-            if isinstance(var, LocalVar):
+            val = self.f_locals.read_value(name)
+            if isinstance(val, Value):
                 self.f_locals.write_local_value(name, value)
             else:
-                val = self.f_locals.read_value(name)
                 assert isinstance(val, SymbolTable), val
                 val.write_local_value(name, value)
         else:
@@ -149,19 +159,16 @@ class Frame:
                 raise NotImplementedError
 
     def _find_nonlocal_namespace(self, name: str) -> Namespace:
+        frame: Frame = self
         parent_frame: Frame = self.f_back
         while parent_frame is not None and parent_frame.f_globals is self.f_globals:
+            if sys.function_summaries:
+                frame._read_callers()
             if parent_frame.f_locals.contains(name):
-                (
-                    var,
-                    _,
-                ) = parent_frame.f_locals.read_var_type(name)
-                if isinstance(var, LocalVar):
+                val = parent_frame.f_locals.read_value(name)
+                if isinstance(val, Value):
                     return parent_frame.f_locals
-                else:
-                    parent_frame = parent_frame.f_back
-            else:
-                parent_frame = parent_frame.f_back
+            frame, parent_frame = parent_frame, parent_frame.f_back
         raise AttributeError
 
     def _find_global_namespace(self, name: str) -> Namespace:
@@ -177,14 +184,13 @@ class Frame:
 
         # delete names in current scope
         if self.f_locals.contains(name):
-            var: Var = self.f_locals.read_var_type(name)
-            if not isinstance(var, LocalVar):
-                owner_namespace = self.f_locals.read_value(name)
+            val = self.f_locals.read_value(name)
+            if not isinstance(val, Value):
+                owner_namespace = val
                 assert isinstance(owner_namespace, Namespace)
-                owner = owner_namespace.read_var_type(name)
-                assert isinstance(owner, LocalVar)
-                del owner_namespace[owner]
-            del self.f_locals[var]
+                assert isinstance(owner_namespace.read_value(name), Value)
+                owner_namespace.del_local_var(name)
+            self.f_locals.del_local_var(name)
 
 
 class Stack:
@@ -16,7 +16,7 @@ from __future__ import annotations
 import ast
 import sys
 from copy import deepcopy
-from typing import List, Dict
+from typing import List, Dict, Set
 
 from dmf.analysis.analysis_types import (
     Float_Instance,
@@ -29,9 +29,14 @@ from dmf.analysis.analysis_types import (
     Int_Type,
 )
 from dmf.analysis.artificial_basic_types import Artificial
-from dmf.analysis.exceptions import ParsingDefaultsError, ParsingKwDefaultsError
+from dmf.analysis.exceptions import (
+    ParsingDefaultsError,
+    ParsingKwDefaultsError,
+    SharedNamespaceWriteError,
+)
 from dmf.analysis.gets_sets import analysis_getattr
 from dmf.analysis.implicit_names import POS_ARG_LEN
+from dmf.analysis.namespace import Namespace
 from dmf.analysis.special_types import Any
 from dmf.analysis.stack import Stack, Frame
 from dmf.analysis.typeshed_types import Typeshed
@@ -52,14 +57,51 @@ BOTTOM = StateBottom()
 
 
 class State:
+    # the last version handed out
+    versions: int = 0
+
     def __init__(
         self,
         stack: Stack,
     ):
-        self.stack: Stack = stack
+        self._stack: Stack = stack
+        # True if self._stack may be referenced by another state as well.
+        # Such a stack is never modified, it's copied on first access instead.
+        self._shared: bool = False
+        # version of a shared stack, states with the same version have the
+        # same content. None if the stack may still be modified.
+        self.version: int | None = None
+        # the program point the state is transferred at, see copy_state
+        self.program_point = None
 
     def __repr__(self):
-        return f"{self.stack}"
+        return f"{self._stack}"
+
+    @property
+    def stack(self) -> Stack:
+        if self._shared:
+            self._stack = deepcopy(self._stack)
+            self._shared = False
+            self.version = None
+        return self._stack
+
+    @stack.setter
+    def stack(self, stack: Stack):
+        self._stack = stack
+        self._shared = False
+        self.version = None
+
+    def copy(self) -> State:
+        # copy-on-write, both states share the stack until one of them
+        # accesses it
+        self._shared = True
+        if self.version is None:
+            State.versions += 1
+            self.version = State.versions
+        new_state = State(self._stack)
+        new_state._shared = True
+        new_state.version = self.version
+        return new_state
 
     def __le__(self, other):
         return self.stack <= other.stack
@@ -96,6 +138,14 @@ class State:
         if isinstance(expr, ast.Attribute):
             value = Value()
             receiver_value = self.compute_value_of_expr(expr.value)
+            if (
+                sys.inline_caches
+                and self.program_point is not None
+                and not receiver_value.is_any()
+            ):
+                return sys.analysis.cached_getattrs(
+                    self.program_point, receiver_value, expr.attr
+                )
             for one_receiver in receiver_value:
                 one_value = analysis_getattr(one_receiver, expr.attr)
                 value.inject_value(one_value)
@@ -133,6 +183,10 @@ class State:
             value = type_2_value(Ellipsis_Instance)
             return value
         elif isinstance(expr, ast.Name):
+            if sys.sparse_propagation and self.program_point is not None:
+                value = sys.analysis.read_temp(expr.id, self.program_point)
+                if value is not None:
+                    return value
             value = self.stack.read_var(expr.id)
             return value
         elif isinstance(expr, ast.Index):
@@ -290,15 +344,9 @@ class State:
             stack.write_var(arguments.kwarg.arg, "local", Value.make_any())
 
 
-def deepcopy_state(state: State, program_point) -> State:
-
-    memo = {}
-    for name in sys.analysis_modules:
-        modules = sys.analysis_modules[name]
-        sys.analysis_modules[name] = deepcopy(modules, memo)
-
-    # sys.analysis_modules = deepcopy(sys.analysis_modules, memo)
-    new_state = deepcopy(state, memo)
+def copy_state(state: State, program_point) -> State:
+    new_state = state.copy()
+    new_state.program_point = program_point
 
     # sync state
     sys.state = new_state
@@ -311,16 +359,124 @@ def is_bot_state(state: State) -> bool:
     return False
 
 
-def compare_states(lhs: State | BOTTOM, rhs: State | BOTTOM) -> bool:
+# With names, only those names of the top frame are compared, the rest of lhs
+# is known to be included in rhs already.
+def compare_states(
+    lhs: State | BOTTOM, rhs: State | BOTTOM, names: Set[str] | None = None
+) -> bool:
     if is_bot_state(lhs):
         return True
     if is_bot_state(rhs):
         return False
 
-    res = lhs.stack <= rhs.stack
+    # lhs is only read, so there is no need to copy its stack.
+    # rhs may get missing names filled in, so compare against its shared stack
+    # first and copy it only if that really happens.
+    if rhs._shared:
+        Namespace.frozen = True
+        try:
+            return _compare_stacks(lhs._stack, rhs._stack, names)
+        except SharedNamespaceWriteError:
+            pass
+        finally:
+            Namespace.frozen = False
+
+    res = _compare_stacks(lhs._stack, rhs.stack, names)
     return res
 
 
+def _compare_stacks(lhs: Stack, rhs: Stack, names: Set[str] | None) -> bool:
+    if names is None or not lhs.frames:
+        return lhs <= rhs
+
+    lhs_locals = lhs.top_frame().f_locals
+    rhs_locals = rhs.top_frame().f_locals
+    if lhs_locals is rhs_locals:
+        return True
+    # in the order of Namespace.__le__, which names get filled in depends on it
+    for var in lhs_locals:
+        if var in names and not lhs_locals[var] <= rhs_locals[var]:
+            return False
+    return True
+
+
+def namespace_sizes(state: State) -> List[int]:
+    return [len(frame.f_locals) for frame in state._stack.frames]
+
+
+# Names filled in the top frame of state by compare_states, given the sizes of
+# its namespaces before. None if names were filled in other frames as well.
+def filled_names(state: State, sizes: List[int]) -> Set[str] | None:
+    frames = state._stack.frames
+    for frame, size in zip(frames[:-1], sizes):
+        if len(frame.f_locals) != size:
+            return None
+    if not frames or len(frames[-1].f_locals) == sizes[-1]:
+        return set()
+    # names are filled in at the end
+    return {var.name for var in list(frames[-1].f_locals)[sizes[-1] :]}
+
+
+# Names of the top frame that merging lhs into rhs may change, or None if it
+# may change other frames as well. With names, the rest of lhs is known to be
+# included in rhs already.
+def state_delta(lhs: State, rhs: State, names: Set[str] | None) -> Set[str] | None:
+    lhs_frames, rhs_frames = lhs._stack.frames, rhs._stack.frames
+    if len(lhs_frames) != len(rhs_frames):
+        return None
+    if not lhs_frames:
+        return set()
+    if lhs_frames[-1].f_globals is not rhs_frames[-1].f_globals:
+        return None
+
+    # only read them, missing names are changes rather than filled in
+    Namespace.frozen = True
+    try:
+        for lhs_frame, rhs_frame in zip(lhs_frames[:-1], rhs_frames[:-1]):
+            if lhs_frame.f_globals is not rhs_frame.f_globals:
+                return None
+            lhs_locals, rhs_locals = lhs_frame.f_locals, rhs_frame.f_locals
+            if lhs_locals is rhs_locals:
+                continue
+            if not isinstance(lhs_locals, Namespace):
+                return None
+            # names only in rhs become Any when merged
+            for var in rhs_locals:
+                if not dict.__contains__(lhs_locals, var):
+                    return None
+            if names is None and not lhs_locals <= rhs_locals:
+                return None
+
+        lhs_locals = lhs_frames[-1].f_locals
+        rhs_locals = rhs_frames[-1].f_locals
+        if lhs_locals is rhs_locals:
+            return set()
+        if not isinstance(lhs_locals, Namespace):
+            return None
+        delta = {
+            var.name for var in rhs_locals if not dict.__contains__(lhs_locals, var)
+        }
+        for var in lhs_locals:
+            if names is not None and var not in names:
+                continue
+            if not dict.__contains__(rhs_locals, var):
+                delta.add(var.name)
+                continue
+            lhs_value = lhs_locals[var]
+            rhs_value = rhs_locals[var]
+            if isinstance(lhs_value, Value) and isinstance(rhs_value, Value):
+                if not lhs_value <= rhs_value:
+                    delta.add(var.name)
+            # nonlocal and global names, their owners are compared above
+            elif isinstance(lhs_value, Value) or isinstance(rhs_value, Value):
+                return None
+        return delta
+    except SharedNamespaceWriteError:
+        return None
+    finally:
+        Namespace.frozen = False
+
+
 def merge_states(lhs: State, rhs: State | BOTTOM) -> State:
     # if lhs is BOTTOM, we won't get here.
     if is_bot_state(rhs):
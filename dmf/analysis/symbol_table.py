@@ -20,13 +20,19 @@ class SymbolTable(dict):
 
 
 class Var:
+    __slots__ = ("name",)
+
     def __init__(self, name: str):
         self.name: str = name
 
     def __hash__(self):
         return hash(self.name)
 
-    def __eq__(self, other: Var):
+    # a name is bound in one scope of a namespace at most, so vars compare by
+    # name only. Namespaces can then be probed with the plain name string
+    def __eq__(self, other: Var | str):
+        if other.__class__ is str:
+            return self.name == other
         return self.name == other.name
 
     def is_temp(self):
@@ -37,15 +43,21 @@ class Var:
 
 
 class LocalVar(Var):
+    __slots__ = ()
+
     def __repr__(self):
         return f"({self.name}, local)"
 
 
 class NonlocalVar(Var):
+    __slots__ = ()
+
     def __repr__(self):
         return f"({self.name}, nonlocal)"
 
 
 class GlobalVar(Var):
+    __slots__ = ()
+
     def __repr__(self):
         return f"({self.name}, global)"
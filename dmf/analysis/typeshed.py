@@ -15,7 +15,7 @@ import os
 import sys
 from functools import lru_cache
 from pathlib import Path
-from typing import NamedTuple, Tuple, Optional, Dict
+from typing import NamedTuple, Tuple, Optional, Dict, FrozenSet
 
 import dmf.resources
 
@@ -103,6 +103,19 @@ def get_typeshed_versions(typeshed: Path) -> Dict[str, _VersionData]:
     return versions
 
 
+@lru_cache()
+def get_stdlib_modules(typeshed: Path) -> FrozenSet[str]:
+    # top-level modules of the standard library in the analysed python version
+    version = default_search_context.version
+    return frozenset(
+        module
+        for module, data in get_typeshed_versions(typeshed).items()
+        if "." not in module
+        and data.min <= version
+        and (data.max is None or version <= data.max)
+    )
+
+
 def _parse_version(version: str) -> Tuple[int, int]:
     major, minor = version.split(".")
     return int(major), int(minor)
@@ -0,0 +1,162 @@
+#  Copyright 2022 Layne Liu
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# On-disk cache of parsed typeshed stubs, that is the namespaces built by
+# ModuleVisitor. It is built next to the bundled typeshed by running
+#   python -m dmf.analysis.typeshed_cache
+# and the analysis loads records from it lazily, one module at a time.
+# A record is keyed by the hash of the stub, and remembers the hashes of the
+# stubs it star-imports, since their names are copied into the record too.
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import zlib
+from typing import Optional, Dict, Tuple
+
+import dmf
+import dmf.resources
+from dmf.analysis.namespace import Namespace
+from dmf.analysis.typeshed import default_search_context, get_stub_file
+from dmf.log.logger import logger
+
+# bump it whenever the layout of the records changes
+TYPESHED_CACHE_FORMAT = 3
+
+cache_dir: str = os.path.join(dmf.resources.__path__[0], "typeshed_cache")
+# records are only written by build_typeshed_cache
+building: bool = False
+
+# module -> {star-imported module -> stub hash}, including indirect ones
+dependencies: Dict[str, Dict[str, str]] = {}
+
+
+def stub_hash(module: str, source: str) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(
+        f"{TYPESHED_CACHE_FORMAT} {dmf.__version__} "
+        f"{default_search_context.version} {default_search_context.platform} "
+        f"{module}\0".encode()
+    )
+    hasher.update(source.encode())
+    return hasher.hexdigest()
+
+
+def _read_stub(module: str) -> str:
+    return get_stub_file(module).read_text()
+
+
+def _cache_path(module: str, source: str) -> str:
+    return os.path.join(cache_dir, f"{stub_hash(module, source)}.bin")
+
+
+def load_typeshed_module(module: str, source: str) -> Optional[Namespace]:
+    cache_path = _cache_path(module, source)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, "rb") as handler:
+            module_dependencies, module_dict = pickle.loads(
+                zlib.decompress(handler.read())
+            )
+    except Exception as e:
+        logger.warning(f"Ignore broken typeshed cache {cache_path}: {e}")
+        return None
+
+    for dependency, dependency_hash in module_dependencies.items():
+        if stub_hash(dependency, _read_stub(dependency)) != dependency_hash:
+            return None
+    dependencies[module] = module_dependencies
+    return module_dict
+
+
+def dump_typeshed_module(
+    module: str, source: str, star_imports: Tuple[str, ...], module_dict: Namespace
+):
+    module_dependencies = {}
+    for star_import in star_imports:
+        module_dependencies[star_import] = stub_hash(
+            star_import, _read_stub(star_import)
+        )
+        module_dependencies.update(dependencies.get(star_import, {}))
+    dependencies[module] = module_dependencies
+
+    if not building:
+        return
+
+    cache_path = _cache_path(module, source)
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first, so that concurrent runs never see
+    # a partially written cache file
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, "wb") as handler:
+        handler.write(
+            zlib.compress(
+                pickle.dumps(
+                    (module_dependencies, module_dict),
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            )
+        )
+    os.replace(temp_path, cache_path)
+
+
+def stub_modules():
+    typeshed = default_search_context.typeshed
+    for dir_path, dir_names, file_names in os.walk(typeshed):
+        # such as @python2
+        dir_names[:] = sorted(name for name in dir_names if name.isidentifier())
+        package = os.path.relpath(dir_path, typeshed).split(os.sep)
+        if package == ["."]:
+            package = []
+        for file_name in sorted(file_names):
+            name, ext = os.path.splitext(file_name)
+            if ext != ".pyi":
+                continue
+            if name == "__init__":
+                if package:
+                    yield ".".join(package)
+            elif name.isidentifier():
+                yield ".".join(package + [name])
+
+
+def build_typeshed_cache():
+    global building
+    from dmf.analysis.typeshed_types import parse_typeshed_module
+
+    building = True
+    built = failed = 0
+    for module in stub_modules():
+        try:
+            parse_typeshed_module(module)
+        except Exception as e:
+            # not available in this python version, or not supported by
+            # ModuleVisitor. Such modules are parsed again if imported
+            logger.debug(f"Skip typeshed module {module}: {e!r}")
+            failed += 1
+        else:
+            built += 1
+    logger.critical(f"cached {built} typeshed modules, skipped {failed}")
+
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(10**6)
+    # go through the imported module rather than __main__, which is the one
+    # parse_typeshed_module sees
+    from dmf.analysis import typeshed_cache
+
+    typeshed_cache.build_typeshed_cache()
@@ -21,6 +21,7 @@ from dmf.analysis.namespace import Namespace
 from dmf.analysis.special_types import Any
 from dmf.analysis.symbol_table import LocalVar
 from dmf.analysis.typeshed import get_stub_file
+from dmf.analysis.typeshed_cache import load_typeshed_module, dump_typeshed_module
 from dmf.analysis.value import type_2_value, Value
 
 
@@ -38,7 +39,18 @@ class UniqueTypeshedObject(type):
         return typeshed_object
 
 
+# unpickle typeshed objects to the interned ones, if there are any
+def _restore_typeshed(cls, tp_qualname):
+    typeshed_object_dict = UniqueTypeshedObject.typeshed_object_dict
+    if tp_qualname not in typeshed_object_dict:
+        typeshed_object_dict[tp_qualname] = object.__new__(cls)
+    return typeshed_object_dict[tp_qualname]
+
+
 class Typeshed(metaclass=UniqueTypeshedObject):
+    # shared by all states, see Value.intern
+    tp_shared: bool = True
+
     def __init__(self, tp_name: str, tp_module: str, tp_qualname: str):
         # fully qualified name
         self.tp_uuid: str = f"typeshed.{tp_qualname}"
@@ -63,6 +75,14 @@ class Typeshed(metaclass=UniqueTypeshedObject):
             memo[id(self)] = self
         return memo[id(self)]
 
+    def __reduce__(self):
+        return _restore_typeshed, (type(self), self.tp_qualname), self.__dict__
+
+    def __setstate__(self, state):
+        # an interned object is kept as it is
+        if not self.__dict__:
+            self.__dict__.update(state)
+
     def refine_self_to_value(self, *args, **kwargs) -> Value:
         value = Value()
         value.inject(self)
@@ -175,11 +195,16 @@ def parse_typeshed_module(module: str):
     path = get_stub_file(module)
     # read file
     module_content = path.read_text()
-    # parse module
-    module_ast = ast.parse(module_content)
-    # setup parsing env
-    visitor = ModuleVisitor(module, module_ast, qualified_name=module)
-    module_dict = visitor.build()
+    module_dict = load_typeshed_module(module, module_content)
+    if module_dict is None:
+        # parse module
+        module_ast = ast.parse(module_content)
+        # setup parsing env
+        visitor = ModuleVisitor(module, module_ast, qualified_name=module)
+        module_dict = visitor.build()
+        dump_typeshed_module(
+            module, module_content, tuple(visitor.star_imports), module_dict
+        )
     typeshed_module = TypeshedModule(
         tp_name=module, tp_module=module, tp_qualname=module, tp_dict=module_dict
     )
@@ -198,6 +223,8 @@ class ModuleVisitor(ast.NodeVisitor):
         self.module_ast = module_ast
         self.module_dict = Namespace()
         self.qualname = qualified_name
+        # modules whose names are copied by "from xxx import *"
+        self.star_imports: List[str] = []
 
     def build(self):
         self.visit(self.module_ast)
@@ -343,6 +370,7 @@ class ModuleVisitor(ast.NodeVisitor):
                 value = type_2_value(typeshed_importedname)
                 self.module_dict.write_local_value(alias.asname, value)
             elif alias.name == "*":
+                self.star_imports.append(node.module)
                 modules = parse_typeshed_module(module=node.module)
                 for module in modules:
                     for var, value in module.tp_dict.items():
@@ -11,39 +11,71 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-from copy import deepcopy
+from typing import Dict
 
+from dmf.analysis.shared_version import SharedVersion
 from dmf.analysis.symbol_table import LocalVar, Var, SymbolTable
 from dmf.analysis.value import Value
 
 
 class UnionNamespace(SymbolTable):
+    # see SharedVersion
+    version: int = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # name -> var bound to it, so that reads don't go through all vars
+        self.vars: Dict[str, Var] = {var.name: var for var in self}
+
+    # every binding goes through these two, including __missing__ and __iadd__
+    def __setitem__(self, var: Var, value: Value):
+        old = dict.get(self, var)
+        if old is None or not value <= old:
+            SharedVersion.bump(self)
+        super().__setitem__(var, value)
+        # a dict keeps the key it was first set with
+        self.vars.setdefault(var.name, var)
+
+    def __delitem__(self, var: Var):
+        SharedVersion.bump(self)
+        super().__delitem__(var)
+        del self.vars[var.name]
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
     def __missing__(self, key):
         self[key] = value = Value()
         return value
 
+    # module and function namespaces are weakly updated and shared by all
+    # states, so copying a state never copies them.
     def __deepcopy__(self, memo):
-        for var in self:
-            value = self[var]
-            new_value = deepcopy(value, memo)
-            self[var] = new_value
-        return self
+        if id(self) not in memo:
+            memo[id(self)] = self
+        return memo[id(self)]
 
     def __le__(self, other):
+        # such as module frames, whose locals are their globals
+        if self is other:
+            return True
         for var in self:
             if not self[var] <= other[var]:
                 return False
         return True
 
     def __iadd__(self, other):
+        if self is other:
+            return self
         for var in other:
+            # joined in place, so __setitem__ can't tell
+            if not other[var] <= self[var]:
+                SharedVersion.bump(self)
             self[var] += other[var]
         return self
 
     def contains(self, name: str):
-        if LocalVar(name) in self:
-            return True
-        return False
+        return name in self.vars
 
     def __contains__(self, item):
         if isinstance(item, str):
@@ -51,16 +83,14 @@ class UnionNamespace(SymbolTable):
         return super().__contains__(item)
 
     def read_var_type(self, name: str) -> Var:
-        for var, _ in self.items():
-            if name == var.name:
-                return var
-        raise AttributeError(name)
+        if name not in self.vars:
+            raise AttributeError(name)
+        return self.vars[name]
 
     def read_value(self, name: str) -> Value:
-        for var, val in self.items():
-            if name == var.name:
-                return val
-        raise AttributeError(name)
+        if name not in self.vars:
+            raise AttributeError(name)
+        return dict.__getitem__(self, self.vars[name])
 
     def write_local_value(self, name: str, value: Value):
         union_value = Value()
@@ -14,12 +14,41 @@
 
 from __future__ import annotations
 
+import sys
+from copy import deepcopy
+from typing import Dict, Optional, Set
+
 from dmf.analysis.special_types import Any
 
 
+class TypeUniverse:
+    # tp_uuid -> a bit of its own, so that a set of types is an int bitmask
+    bits: Dict[object, int] = {}
+    # bits of types which are shared by all states, their __le__ is always True
+    shared_mask: int = 0
+
+    @classmethod
+    def bit(cls, type) -> int:
+        uuid = type.tp_uuid
+        if uuid not in cls.bits:
+            cls.bits[uuid] = bit = 1 << len(cls.bits)
+            if getattr(type, "tp_shared", False):
+                cls.shared_mask |= bit
+        return cls.bits[uuid]
+
+
 class Value:
+    __slots__ = ("types", "mask")
+
     threshold = 5
 
+    # With sys.hash_cons, a value is interned when its state is copied if all
+    # of its types are shared by all states (tp_shared). Equal values then
+    # share one object, which is never modified in place.
+    # mask, or Any -> interned value
+    interned: Dict[object, Value] = {}
+    interned_ids: Set[int] = set()
+
     def threshold_check(self):
         if self.types is Any:
             return
@@ -39,6 +68,21 @@ class Value:
             self.types = Any
         else:
             self.types = {}
+        # bits of the keys of self.types, meaningless once it's Any
+        self.mask: int = 0
+
+    def __getstate__(self):
+        # bits are only valid in the process that assigned them.
+        # The tuple keeps pickle from skipping __setstate__ for empty values
+        return (self.types,)
+
+    def __setstate__(self, state):
+        (types,) = state
+        self.types = types
+        self.mask = 0
+        if types is not Any:
+            for type in types.values():
+                self.mask |= TypeUniverse.bit(type)
 
     def __len__(self):
         if self.types is Any:
@@ -47,18 +91,32 @@ class Value:
             return len(self.types)
 
     def __le__(self, other: Value) -> bool:
+        if self is other:
+            return True
         if other.types is Any:
             return True
         if self.types is Any:
             return False
+        if self.mask & ~other.mask:
+            return False
+        # only types copied along with states can be smaller than their peers
+        if not self.mask & ~TypeUniverse.shared_mask:
+            return True
         for k in self.types:
-            if k not in other.types:
-                return False
-            elif not self.types[k] <= other.types[k]:
+            if not self.types[k] <= other.types[k]:
                 return False
         return True
 
     def __iadd__(self, other: Value) -> Value:
+        if id(self) in Value.interned_ids:
+            if other <= self:
+                return self
+            # copy on write
+            value = Value()
+            value.types = dict(self.types)
+            value.mask = self.mask
+            value += other
+            return value
         if self.types is Any:
             return self
         elif other.types is Any:
@@ -70,9 +128,44 @@ class Value:
                     self.types[k] = other.types[k]
                 else:
                     self.types[k] += other.types[k]
+            self.mask |= other.mask
             self.threshold_check()
             return self
 
+    def __deepcopy__(self, memo):
+        if id(self) in Value.interned_ids:
+            return self
+        if sys.hash_cons:
+            value = self.intern()
+            if value is not None:
+                memo[id(self)] = value
+                return value
+
+        value = Value.__new__(Value)
+        memo[id(self)] = value
+        value.mask = self.mask
+        if self.types is Any:
+            value.types = Any
+        else:
+            value.types = {k: deepcopy(type, memo) for k, type in self.types.items()}
+        return value
+
+    def intern(self) -> Optional[Value]:
+        if self.types is Any:
+            key = Any
+        else:
+            if self.mask & ~TypeUniverse.shared_mask:
+                return None
+            key = self.mask
+
+        if key not in Value.interned:
+            value = Value()
+            value.types = self.types if self.types is Any else dict(self.types)
+            value.mask = self.mask
+            Value.interned[key] = value
+            Value.interned_ids.add(id(value))
+        return Value.interned[key]
+
     def __repr__(self):
         # return self.types.__repr__()
         if self.types is Any:
@@ -104,6 +197,7 @@ class Value:
             self.types[type.tp_uuid] += type
         else:
             self.types[type.tp_uuid] = type
+            self.mask |= TypeUniverse.bit(type)
 
         self.threshold_check()
 
@@ -120,6 +214,7 @@ class Value:
                 self.types[label] = type
             else:
                 self.types[label] += type
+        self.mask |= value.mask
 
         self.threshold_check()
 
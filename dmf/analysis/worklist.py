@@ -0,0 +1,230 @@
+#  Copyright 2022 Layne Liu
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from __future__ import annotations
+
+import heapq
+import math
+from collections import defaultdict, deque
+from typing import Tuple, Dict, List, Iterable, Deque, Set
+
+from dmf.analysis.analysisbase import ProgramPoint
+from dmf.flows import CFG
+
+Flow = Tuple[ProgramPoint, ProgramPoint]
+
+
+def reverse_postorder(entry: int, successors: Dict[int, List[int]]) -> Dict[int, int]:
+    postorder: List[int] = []
+    visited: Set[int] = {entry}
+    stack = [(entry, iter(successors.get(entry, ())))]
+    while stack:
+        label, succs = stack[-1]
+        for succ in succs:
+            if succ not in visited:
+                visited.add(succ)
+                stack.append((succ, iter(successors.get(succ, ()))))
+                break
+        else:
+            stack.pop()
+            postorder.append(label)
+    return {label: idx for idx, label in enumerate(reversed(postorder))}
+
+
+# Bourdoncle, Efficient chaotic iteration strategies with widenings.
+# Components are flattened, each head is followed by its body.
+def weak_topological_order(
+    entry: int, successors: Dict[int, List[int]]
+) -> Dict[int, int]:
+    dfn: Dict[int, float] = {}
+    stack: List[int] = []
+    num = 0
+    # partitions are built back to front
+    partitions: List[List[int]] = [[]]
+
+    def visit(label: int) -> float:
+        nonlocal num
+        stack.append(label)
+        num += 1
+        dfn[label] = head = num
+        loop = False
+        for succ in successors.get(label, ()):
+            min_dfn = dfn[succ] if dfn.get(succ, 0) else visit(succ)
+            if min_dfn <= head:
+                head = min_dfn
+                loop = True
+        if head == dfn[label]:
+            dfn[label] = math.inf
+            element = stack.pop()
+            if loop:
+                while element != label:
+                    dfn[element] = 0
+                    element = stack.pop()
+                component(label)
+            else:
+                partitions[-1].append(label)
+        return head
+
+    def component(label: int):
+        partitions.append([])
+        for succ in successors.get(label, ()):
+            if not dfn.get(succ, 0):
+                visit(succ)
+        body = partitions.pop()
+        partitions[-1].extend(body)
+        partitions[-1].append(label)
+
+    visit(entry)
+    return {label: idx for idx, label in enumerate(reversed(partitions[0]))}
+
+
+class WorkList:
+    def __init__(self):
+        # number of flows popped so far
+        self.iterations: int = 0
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def add_cfg(self, cfg: CFG):
+        pass
+
+    # schedule flows generated by a program point
+    def push(self, flows: Iterable[Flow]):
+        raise NotImplementedError
+
+    # schedule flows that have to go first, such as those of imported modules
+    def push_first(self, flows: List[Flow]):
+        raise NotImplementedError
+
+    def pop(self) -> Flow:
+        raise NotImplementedError
+
+
+class LIFOWorkList(WorkList):
+    def __init__(self):
+        super().__init__()
+        self.flows: Deque[Tuple[Flow, int]] = deque()
+        # flow -> stamp of its latest copy in self.flows, other copies are stale
+        self.queued: Dict[Flow, int] = {}
+        self.stamp: int = 0
+
+    def __len__(self):
+        return len(self.queued)
+
+    def _append(self, flow: Flow, left: bool):
+        self.stamp += 1
+        self.queued[flow] = self.stamp
+        if left:
+            self.flows.appendleft((flow, self.stamp))
+        else:
+            self.flows.append((flow, self.stamp))
+
+    def push(self, flows: Iterable[Flow]):
+        for flow in flows:
+            self._append(flow, True)
+
+    def push_first(self, flows: List[Flow]):
+        for flow in reversed(flows):
+            self._append(flow, True)
+
+    def pop(self) -> Flow:
+        while True:
+            flow, stamp = self.flows.popleft()
+            if self.queued.get(flow) == stamp:
+                del self.queued[flow]
+                self.iterations += 1
+                return flow
+
+
+class FIFOWorkList(LIFOWorkList):
+    def push(self, flows: Iterable[Flow]):
+        for flow in flows:
+            if flow not in self.queued:
+                self._append(flow, False)
+
+
+class PriorityWorkList(WorkList):
+    def __init__(self):
+        super().__init__()
+        self.flows: List[Tuple[Tuple[int, int], int, Flow]] = []
+        self.queued: Set[Flow] = set()
+        self.counter: int = 0
+        # label -> (age of its cfg, position in its cfg)
+        self.priorities: Dict[int, Tuple[int, int]] = {}
+        self.cfg_count: int = 0
+
+    def __len__(self):
+        return len(self.queued)
+
+    def order(self, entry: int, successors: Dict[int, List[int]]) -> Dict[int, int]:
+        raise NotImplementedError
+
+    def add_cfg(self, cfg: CFG):
+        entry = cfg.start_block.bid
+        if entry in self.priorities:
+            return
+
+        # edges still contain call -> return edges which are not in cfg.flows
+        successors = defaultdict(list)
+        for fst_lab, snd_lab in cfg.edges:
+            successors[fst_lab].append(snd_lab)
+
+        # cfgs merged later, such as callees and imported modules, go first.
+        # So they are drained before going back to their callers.
+        self.cfg_count += 1
+        for label, position in self.order(entry, successors).items():
+            self.priorities[label] = (-self.cfg_count, position)
+
+    def push(self, flows: Iterable[Flow]):
+        for flow in flows:
+            if flow in self.queued:
+                continue
+            self.queued.add(flow)
+            self.counter += 1
+            (label, _), _ = flow
+            priority = self.priorities.get(label, (0, 0))
+            heapq.heappush(self.flows, (priority, self.counter, flow))
+
+    def push_first(self, flows: List[Flow]):
+        self.push(flows)
+
+    def pop(self) -> Flow:
+        _, _, flow = heapq.heappop(self.flows)
+        self.queued.remove(flow)
+        self.iterations += 1
+        return flow
+
+
+class RPOWorkList(PriorityWorkList):
+    def order(self, entry: int, successors: Dict[int, List[int]]) -> Dict[int, int]:
+        return reverse_postorder(entry, successors)
+
+
+class WTOWorkList(PriorityWorkList):
+    def order(self, entry: int, successors: Dict[int, List[int]]) -> Dict[int, int]:
+        return weak_topological_order(entry, successors)
+
+
+work_lists = {
+    "lifo": LIFOWorkList,
+    "fifo": FIFOWorkList,
+    "rpo": RPOWorkList,
+    "wto": WTOWorkList,
+}
+
+
+def make_work_list(strategy: str) -> WorkList:
+    if strategy not in work_lists:
+        raise NotImplementedError(strategy)
+    return work_lists[strategy]()
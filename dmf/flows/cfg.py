@@ -14,24 +14,106 @@
 
 import ast
 import os
+import pickle
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
 
 import autopep8
 
 from dmf.flows import flows
+from dmf.flows.cfg_cache import load_CFG, dump_CFG, source_hash
 from dmf.log.logger import logger
 
 
-def construct_CFG(file_path) -> flows.CFG:
+class Autopep8Fallback:
+    # number of sources that only parsed after autopep8 normalised them
+    counter: int = 0
+    # source hash -> normalised source
+    normalised: Dict[str, str] = {}
+
+
+def parse_source(source: str, file_path: str = "<unknown>") -> ast.Module:
+    try:
+        return ast.parse(source)
+    except SyntaxError:
+        pass
+
+    Autopep8Fallback.counter += 1
+    logger.debug("Normalising {} with autopep8".format(file_path))
+    key = source_hash(source)
+    if key not in Autopep8Fallback.normalised:
+        Autopep8Fallback.normalised[key] = autopep8.fix_code(source)
+    return ast.parse(Autopep8Fallback.normalised[key])
+
+
+def construct_CFG(file_path, module_id: int = None) -> flows.CFG:
+    if module_id is None:
+        module_id = flows.ModuleId.of(file_path)
+
     with open(file_path) as handler:
-        source = autopep8.fix_code(handler.read())
+        raw_source = handler.read()
+
+    base_name = os.path.basename(file_path)
+    cfg = load_CFG(raw_source, module_id)
+    if cfg is not None:
+        logger.debug("Loaded cached CFG of {}".format(file_path))
+    else:
+        flows.enter_module(module_id)
         visitor = flows.CFGVisitor()
-        base_name = os.path.basename(file_path)
-        cfg = visitor.build(base_name, ast.parse(source))
+        cfg = visitor.build(base_name, parse_source(raw_source, file_path))
         logger.debug("Previous edges: {}".format(sorted(cfg.edges.keys())))
         logger.debug("Refactored flows: {}".format(visitor.cfg.flows))
-        if sys.open_graph:
-            left_base_name = base_name.partition(".")[0]
-            cfg.show(name=left_base_name)
+        dump_CFG(raw_source, cfg, module_id)
+
+    if sys.open_graph:
+        left_base_name = base_name.partition(".")[0]
+        cfg.show(name=left_base_name)
+
+    return cfg
+
+
+def _init_worker(cfg_cache_dir, open_graph):
+    sys.cfg_cache_dir = cfg_cache_dir
+    sys.open_graph = open_graph
+
+
+def _construct_CFG_worker(file_path: str, module_id: int) -> Tuple[bytes, int]:
+    fallbacks = Autopep8Fallback.counter
+    cfg = construct_CFG(file_path, module_id)
+    # pickle here so that the CFG is unpickled in the main thread of the
+    # parent, which has a much larger stack than the result thread of the pool
+    return (
+        pickle.dumps(cfg, protocol=pickle.HIGHEST_PROTOCOL),
+        Autopep8Fallback.counter - fallbacks,
+    )
+
+
+def construct_CFGs(
+    file_paths: List[str], max_workers: int = None
+) -> Dict[str, flows.CFG]:
+    # module ids are assigned up front, so labels don't depend on which
+    # worker finishes first
+    module_ids = [flows.ModuleId.of(file_path) for file_path in file_paths]
 
-        return cfg
+    cfgs: Dict[str, flows.CFG] = {}
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(sys.cfg_cache_dir, sys.open_graph),
+    ) as executor:
+        futures = [
+            executor.submit(_construct_CFG_worker, file_path, module_id)
+            for file_path, module_id in zip(file_paths, module_ids)
+        ]
+        for file_path, future in zip(file_paths, futures):
+            try:
+                dumped, fallbacks = future.result()
+            except Exception as e:
+                # leave it to the lazy path, which reports the error if the
+                # module is imported at all
+                logger.warning("Failed to pre-build CFG of {}: {}".format(file_path, e))
+                continue
+            cfgs[file_path] = pickle.loads(dumped)
+            Autopep8Fallback.counter += fallbacks
+    return cfgs
@@ -0,0 +1,129 @@
+#  Copyright 2022 Layne Liu
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# On-disk cache of CFGs, keyed by the hash of the source and the dmf version.
+# Labels embed the module id, so a cached CFG is relocated to the module id
+# of the current run when loaded.
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Optional, Set
+
+import dmf
+from dmf.flows.flows import CFG, LOCAL_LABEL_BITS
+from dmf.log.logger import logger
+
+# bump it whenever CFG construction changes, such as the layout of labels
+CFG_CACHE_FORMAT = 2
+
+
+def source_hash(source: str) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(
+        f"{CFG_CACHE_FORMAT} {dmf.__version__} {sys.version_info[:2]}\0".encode()
+    )
+    hasher.update(source.encode())
+    return hasher.hexdigest()
+
+
+def _cache_path(source: str) -> Optional[str]:
+    if sys.cfg_cache_dir is None:
+        return None
+    return os.path.join(sys.cfg_cache_dir, f"{source_hash(source)}.pickle")
+
+
+def load_CFG(source: str, module_id: int) -> Optional[CFG]:
+    cache_path = _cache_path(source)
+    if cache_path is None or not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, "rb") as handler:
+            cached_module_id, cfg = pickle.load(handler)
+    except Exception as e:
+        logger.warning(f"Ignore broken CFG cache {cache_path}: {e}")
+        return None
+
+    offset = (module_id - cached_module_id) << LOCAL_LABEL_BITS
+    if offset:
+        _relocate_cfg(cfg, offset, set())
+    return cfg
+
+
+def dump_CFG(source: str, cfg: CFG, module_id: int):
+    cache_path = _cache_path(source)
+    if cache_path is None:
+        return
+
+    os.makedirs(sys.cfg_cache_dir, exist_ok=True)
+    # write to a temporary file first, so that concurrent runs never see
+    # a partially written cache file
+    fd, temp_path = tempfile.mkstemp(dir=sys.cfg_cache_dir)
+    with os.fdopen(fd, "wb") as handler:
+        pickle.dump((module_id, cfg), handler, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
+
+
+def _relocate_cfg(cfg: CFG, offset: int, blocks: Set[int]):
+    def relocate_block(block):
+        if id(block) in blocks:
+            return
+        blocks.add(id(block))
+        block.bid += offset
+        block.prev = [bid + offset for bid in block.prev]
+        block.next = [bid + offset for bid in block.next]
+
+    for block in cfg.blocks.values():
+        relocate_block(block)
+    relocate_block(cfg.start_block)
+    relocate_block(cfg.final_block)
+    cfg.blocks = {block.bid: block for block in cfg.blocks.values()}
+
+    cfg.edges = {
+        (fst + offset, snd + offset): condition
+        for (fst, snd), condition in cfg.edges.items()
+    }
+    cfg.flows = {(fst + offset, snd + offset) for fst, snd in cfg.flows}
+
+    for attr in (
+        "call_return_inter_flows",
+        "classdef_inter_flows",
+        "special_init_inter_flows",
+        "magic_right_inter_flows",
+        "magic_left_inter_flows",
+        "magic_del_inter_flows",
+    ):
+        inter_flows = getattr(cfg, attr)
+        setattr(
+            cfg,
+            attr,
+            {tuple(label + offset for label in record) for record in inter_flows},
+        )
+
+    for attr in (
+        "module_entry_labels",
+        "module_exit_labels",
+        "call_labels",
+        "return_labels",
+        "dummy_labels",
+    ):
+        labels = getattr(cfg, attr)
+        setattr(cfg, attr, {label + offset for label in labels})
+
+    for sub_cfg in cfg.sub_cfgs.values():
+        _relocate_cfg(sub_cfg, offset, blocks)
+    cfg.sub_cfgs = {label + offset: sub_cfg for label, sub_cfg in cfg.sub_cfgs.items()}
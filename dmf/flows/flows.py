@@ -25,6 +25,26 @@ VisitedExprRes = Tuple[List, List]
 DecomposedExprRes = Tuple[List, ast.Name, List]
 
 
+# a label is the module id followed by LOCAL_LABEL_BITS bits of local index,
+# so that CFGs of different modules can be built independently
+LOCAL_LABEL_BITS = 20
+
+
+class ModuleId:
+    # file path -> module id, the main module comes first and gets 0
+    ids: Dict[str, int] = {}
+
+    @classmethod
+    def of(cls, file_path: str) -> int:
+        if file_path not in cls.ids:
+            cls.ids[file_path] = len(cls.ids)
+        return cls.ids[file_path]
+
+
+def label_module_id(label: int) -> int:
+    return label >> LOCAL_LABEL_BITS
+
+
 class TempVariableName:
     counter = 0
 
@@ -40,12 +60,21 @@ class TempVariableName:
 
 
 class BlockId:
+    module_id: int = 0
     counter: int = 0
 
     @classmethod
     def gen_block_id(cls) -> int:
         cls.counter += 1
-        return cls.counter
+        assert cls.counter < 1 << LOCAL_LABEL_BITS, cls.counter
+        return cls.module_id << LOCAL_LABEL_BITS | cls.counter
+
+
+def enter_module(module_id: int):
+    # labels and temporary names start over in every module
+    BlockId.module_id = module_id
+    BlockId.counter = 0
+    TempVariableName.counter = 0
 
 
 class BasicBlock:
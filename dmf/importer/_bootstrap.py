@@ -22,8 +22,8 @@ work. One should use importlib as the public-facing version of this module.
 
 # Bootstrap-related code ######################################################
 import _thread, _warnings, _weakref
-from copy import deepcopy
 
+from dmf.analysis.context_sensitivity import EMPTY_CONTEXT
 from dmf.analysis.value import type_2_value
 
 
@@ -735,11 +735,11 @@ def _load_unlocked(spec):
 
             # module namespace
             module_namespace = real_analysis_module.tp_dict
-            module_start_state = deepcopy(sys.state)
+            module_start_state = sys.state.copy()
             # add a new frame for this module
             # module_start_state.exec_a_module(module_namespace)
             # start program point
-            start_program_point = (entry_lab, ())
+            start_program_point = (entry_lab, EMPTY_CONTEXT)
             sys.analysis.module_entry_info[start_program_point] = module_namespace
             # add flows related to this module
             module_flows = sys.analysis.generate_flow(start_program_point)
@@ -18,6 +18,8 @@ import sys
 import timeit
 
 from dmf.analysis.analysis import Analysis
+from dmf.analysis.context_sensitivity import EMPTY_CONTEXT
+from dmf.flows.cfg import Autopep8Fallback, construct_CFGs
 from dmf.log.logger import logger
 
 if sys.platform == "linux":
@@ -30,6 +32,99 @@ sys.setrecursionlimit(10**8)
 parser = argparse.ArgumentParser()
 parser.add_argument("main", help="the main file path")
 parser.add_argument("project", help="the project path")
+parser.add_argument(
+    "--worklist",
+    choices=["lifo", "fifo", "rpo", "wto"],
+    default="lifo",
+    help="order in which the work list is processed",
+)
+parser.add_argument(
+    "--context",
+    choices=["object", "call-site", "hybrid"],
+    default="object",
+    help="what contexts of functions and methods are made of",
+)
+parser.add_argument(
+    "--depth",
+    type=int,
+    default=1,
+    help="number of call sites or receivers kept in contexts",
+)
+parser.add_argument(
+    "--context-limit",
+    type=int,
+    default=0,
+    help="coarsen the contexts of functions analysed in more contexts than this, "
+    "0 keeps all of them",
+)
+parser.add_argument(
+    "--cfg-cache",
+    default=None,
+    help="directory to cache control flow graphs in across runs",
+)
+parser.add_argument(
+    "--hash-cons",
+    action="store_true",
+    help="share one object between equal values made of immutable types",
+)
+parser.add_argument(
+    "--delta",
+    action="store_true",
+    help="propagate only the names that changed along flows visited before",
+)
+parser.add_argument(
+    "--sparse",
+    action="store_true",
+    help="keep temporaries out of states and pass them along def-use chains",
+)
+parser.add_argument(
+    "--join-states",
+    action="store_true",
+    help="only store states at join points and replay them along straight lines",
+)
+parser.add_argument(
+    "--record-effects",
+    action="store_true",
+    help="keep the effects of the last iteration instead of computing them again",
+)
+parser.add_argument(
+    "--summaries",
+    action="store_true",
+    help="answer calls from the exits of callees whose inputs haven't grown",
+)
+parser.add_argument(
+    "--inline-caches",
+    action="store_true",
+    help="remember the results of attribute reads per label and receivers",
+)
+parser.add_argument(
+    "--prebuild-cfgs",
+    action="store_true",
+    help="build control flow graphs of all project files in parallel up front",
+)
+parser.add_argument(
+    "--jobs",
+    type=int,
+    default=None,
+    help="number of processes used by --prebuild-cfgs, defaults to cpu count",
+)
+
+
+def project_files(project_path, main_abs_file_path):
+    # paths are joined the way the importer joins them, so that they match
+    # module.__file__ when the modules are imported
+    file_paths = []
+    for dir_path, dir_names, file_names in os.walk(project_path):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            file_path = os.path.join(dir_path, file_name)
+            if not file_name.endswith(".py"):
+                continue
+            if os.path.abspath(file_path) == main_abs_file_path:
+                continue
+            file_paths.append(file_path)
+    # the main module comes first, so that it gets module id 0
+    return [main_abs_file_path] + file_paths
 
 
 def with_temps(crude, refined):
@@ -112,9 +207,20 @@ def without_temps(crude, refined):
 if __name__ == "__main__":
     start = timeit.default_timer()
     sys.open_graph = False
-    sys.depth = 1
 
     args = parser.parse_args()
+    sys.context_sensitivity = args.context
+    sys.depth = args.depth
+    sys.context_limit = args.context_limit
+    sys.worklist_strategy = args.worklist
+    sys.cfg_cache_dir = args.cfg_cache
+    sys.hash_cons = args.hash_cons
+    sys.delta_propagation = args.delta
+    sys.sparse_propagation = args.sparse
+    sys.join_states = args.join_states
+    sys.record_effects = args.record_effects
+    sys.function_summaries = args.summaries
+    sys.inline_caches = args.inline_caches
     main_path = args.main
     project_path = args.project
     if not main_path or not project_path:
@@ -129,12 +235,21 @@ if __name__ == "__main__":
     # main file location
     main_abs_file_path = os.path.abspath(main_path)
 
+    if args.prebuild_cfgs:
+        prebuild_start = timeit.default_timer()
+        file_paths = project_files(project_path, main_abs_file_path)
+        sys.analysis_cfgs.update(construct_CFGs(file_paths, args.jobs))
+        logger.critical(
+            f"pre-built {len(sys.analysis_cfgs)} CFGs "
+            f"in {timeit.default_timer() - prebuild_start}"
+        )
+
     # crude semantics
     sys.analysis_type = "crude"
     analysis1 = Analysis(main_abs_file_path)
     analysis1.compute_fixed_point()
     crude = analysis1.analysis_effect_list
-    del crude[2, ()]
+    del crude[2, EMPTY_CONTEXT]
     end = timeit.default_timer()
     time_diff = end - start
     # logger.critical(f"crude analysis {time_diff}")
@@ -156,7 +271,7 @@ if __name__ == "__main__":
     analysis2 = Analysis(main_abs_file_path)
     analysis2.compute_fixed_point()
     refined = analysis2.analysis_effect_list
-    del refined[2, ()]
+    del refined[2, EMPTY_CONTEXT]
     end2 = timeit.default_timer()
     time_diff2 = end2 - start2
     # logger.critical(f"refine analysis {time_diff2}")
@@ -165,3 +280,28 @@ if __name__ == "__main__":
     without_temps(crude, refined)
     logger.critical(f"crude analysis {time_diff}")
     logger.critical(f"refine analysis {time_diff2}")
+    logger.critical(
+        f"{sys.worklist_strategy} worklist iterations: "
+        f"crude {analysis1.work_list.iterations}, "
+        f"refined {analysis2.work_list.iterations}"
+    )
+    if sys.function_summaries:
+        logger.critical(
+            f"calls answered by summaries: "
+            f"crude {analysis1.summary_hits}, refined {analysis2.summary_hits}"
+        )
+    if sys.inline_caches:
+        logger.critical(
+            f"inline cache hits: "
+            f"crude {analysis1.inline_cache_hits}/"
+            f"{analysis1.inline_cache_hits + analysis1.inline_cache_misses}, "
+            f"refined {analysis2.inline_cache_hits}/"
+            f"{analysis2.inline_cache_hits + analysis2.inline_cache_misses}"
+        )
+    if sys.context_limit:
+        logger.critical(
+            f"functions in coarser contexts: "
+            f"crude {len(analysis1.context_policy.coarsened())}, "
+            f"refined {len(analysis2.context_policy.coarsened())}"
+        )
+    logger.critical(f"autopep8 fallbacks: {Autopep8Fallback.counter}")
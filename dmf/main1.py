@@ -18,6 +18,7 @@ import sys
 import timeit
 
 from dmf.analysis.analysis import Analysis
+from dmf.analysis.context_sensitivity import EMPTY_CONTEXT
 from dmf.log.logger import logger
 
 if sys.platform == "linux":
@@ -112,7 +113,18 @@ def without_temps(crude, refined):
 if __name__ == "__main__":
     start = timeit.default_timer()
     sys.open_graph = False
+    sys.context_sensitivity = "object"
     sys.depth = 1
+    sys.context_limit = 0
+    sys.worklist_strategy = "lifo"
+    sys.cfg_cache_dir = None
+    sys.hash_cons = False
+    sys.delta_propagation = False
+    sys.sparse_propagation = False
+    sys.join_states = False
+    sys.record_effects = False
+    sys.function_summaries = False
+    sys.inline_caches = False
 
     main_dir = "/home/layne/Desktop/example_projects/eulerlib"
     project_path = main_dir
@@ -135,7 +147,7 @@ if __name__ == "__main__":
         analysis1 = Analysis(main_abs_file_path)
         analysis1.compute_fixed_point()
         crude = analysis1.analysis_effect_list
-        del crude[2, ()]
+        del crude[2, EMPTY_CONTEXT]
         end = timeit.default_timer()
         time_diff = end - start
         sum_time_diff1 += time_diff
@@ -156,7 +168,7 @@ if __name__ == "__main__":
         analysis2 = Analysis(main_abs_file_path)
         analysis2.compute_fixed_point()
         refined = analysis2.analysis_effect_list
-        del refined[2, ()]
+        del refined[2, EMPTY_CONTEXT]
         end2 = timeit.default_timer()
         time_diff2 = end2 - start2
         sum_time_diff2 += time_diff2
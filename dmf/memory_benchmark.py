@@ -0,0 +1,106 @@
+#  Copyright 2022 Layne Liu
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# Measure how much memory a state takes, that is how much copying its stack
+# allocates, after the crude analysis of every file in a directory.
+#   python -m dmf.memory_benchmark examples/calmdown
+
+import argparse
+import os
+import subprocess
+import sys
+import tracemalloc
+from copy import deepcopy
+
+parser = argparse.ArgumentParser()
+parser.add_argument("project", help="directory of main files to measure")
+parser.add_argument("--main", help="measure a single main file, used internally")
+parser.add_argument(
+    "--join-states", action="store_true", help="only store states at join points"
+)
+
+
+def measure(main_path, project_path, join_states):
+    import logging
+
+    from dmf.analysis.analysis import Analysis
+    from dmf.analysis.state import BOTTOM
+
+    logging.disable(logging.CRITICAL)
+    sys.open_graph = False
+    sys.context_sensitivity = "object"
+    sys.depth = 1
+    sys.context_limit = 0
+    sys.worklist_strategy = "lifo"
+    sys.cfg_cache_dir = None
+    sys.hash_cons = False
+    sys.delta_propagation = False
+    sys.sparse_propagation = False
+    sys.join_states = join_states
+    sys.record_effects = False
+    sys.function_summaries = False
+    sys.inline_caches = False
+    sys.analysis_path.append(project_path)
+    sys.first_party = os.path.basename(os.path.abspath(project_path))
+    sys.analysis_type = "crude"
+
+    analysis = Analysis(os.path.abspath(main_path))
+    analysis.compute_fixed_point()
+    states = [state for state in analysis.analysis_list.values() if state is not BOTTOM]
+
+    tracemalloc.start()
+    copies = [deepcopy(state.stack) for state in states]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copies
+    print(f"{len(states)} {size}")
+
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(10**6)
+    args = parser.parse_args()
+    if args.main:
+        measure(args.main, args.project, args.join_states)
+        exit()
+
+    total_states = total_size = 0
+    for file_name in sorted(os.listdir(args.project)):
+        if not file_name.endswith(".py"):
+            continue
+        # one process per file, the analysis keeps global state
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "dmf.memory_benchmark",
+                args.project,
+                "--main",
+                os.path.join(args.project, file_name),
+            ]
+            + (["--join-states"] if args.join_states else []),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        )
+        if result.returncode != 0:
+            print(f"{file_name:<28} failed")
+            continue
+        states, size = map(int, result.stdout.split()[-2:])
+        total_states += states
+        total_size += size
+        print(f"{file_name:<28} {states:>6} states {size // max(states, 1):>8} B/state")
+    print(
+        f"{'total':<28} {total_states:>6} states "
+        f"{total_size // max(total_states, 1):>8} B/state"
+    )